@@ -1,9 +1,30 @@
+import os
 import streamlit as st
-import pandas as pd
+import browse_cache
+import data_export
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def filter_inputs(columns):
+    """Render a filter widget per chosen column and return browse_cache filters."""
+    kinds = dict(columns)
+    chosen = st.multiselect("Filter columns", list(kinds))
+    filters = {}
+    for column in chosen:
+        if kinds[column] == "number":
+            c1, c2 = st.columns(2)
+            low = c1.number_input(f"{column} from", value=None, key=f"browse_low_{column}")
+            high = c2.number_input(f"{column} to", value=None, key=f"browse_high_{column}")
+            filters[column] = ("range", low, high)
+        else:
+            filters[column] = ("contains", st.text_input(f"{column} contains", key=f"browse_text_{column}"))
+    return filters
+
 
 def app():
     st.title("Browse Data")
-    
+
     # Define a dictionary to map user-friendly names to file paths
     data_files = {
         "All Rounder Batting Stats": "All Rounder Batting Stats.csv",
@@ -18,7 +39,7 @@ def app():
         "Overall Bowlers Stats": "Overall_Bowlers_stats.csv",
         "Overall Batsman Stats": "Overall_batsman_stats.csv",
     }
-    
+
     # Create a selectbox for the user to choose a table
     selected_table = st.selectbox(
         "Select a table to view:",
@@ -26,22 +47,50 @@ def app():
         index=None,
         placeholder="Select a table...",
     )
-    
+
     # Load and display the selected data
     if selected_table:
         file_path = data_files[selected_table]
         try:
-            # Load the CSV file into a DataFrame
-            df = pd.read_csv(file_path)
+            # Filtering, sorting and paging run in SQL on a cached copy of the CSV,
+            # so only the visible page is ever read into a DataFrame
+            loaded = browse_cache.ensure_loaded(file_path)
             st.markdown(f"### Showing data for: `{file_path}`")
-            st.dataframe(df, use_container_width=True)
-        except FileNotFoundError:
-            st.error(f"File not found: {file_path}. Please make sure the file is uploaded.")
-        except Exception as e:
-            st.error(f"An error occurred while loading the data: {e}")
 
+            if st.toggle("Show column profile"):
+                st.dataframe(browse_cache.profile(loaded), use_container_width=True, hide_index=True)
 
+            with st.expander("Filters"):
+                filters = filter_inputs(loaded["columns"])
+            c1, c2, c3 = st.columns([3, 1, 1])
+            sort = c1.selectbox("Sort by", [None] + [name for name, _ in loaded["columns"]],
+                                format_func=lambda name: "File order" if name is None else name)
+            descending = c2.toggle("Descending")
+            page_size = c3.selectbox("Rows per page", PAGE_SIZES, index=1)
 
+            # Cursor of each page visited so far; any change of view starts again at page 1
+            view = (file_path, loaded["version"], repr(filters), sort, descending, page_size)
+            if st.session_state.get("browse_view") != view:
+                st.session_state["browse_view"] = view
+                st.session_state["browse_cursors"] = [None]
+            cursors = st.session_state["browse_cursors"]
 
+            df, next_cursor = browse_cache.fetch_page(loaded, filters, sort, descending, page_size, cursors[-1])
+            count, exact = browse_cache.count_rows(loaded, filters)
+            first = (len(cursors) - 1) * page_size
+            st.caption(f"Rows {first + 1 if len(df) else 0:,}–{first + len(df):,} of "
+                       f"{count:,}{'' if exact else '+'} matching")
+            st.dataframe(df, use_container_width=True, hide_index=True)
 
+            c1, c2, _ = st.columns([1, 1, 4])
+            c1.button("◀ Previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+            c2.button("Next ▶", disabled=next_cursor is None, on_click=cursors.append, args=(next_cursor,))
 
+            with st.expander("Export this view"):
+                sql, params = browse_cache.view_query(loaded, filters, sort, descending)
+                data_export.export_panel("browse", browse_cache.CACHE_DB, sql, params,
+                                         os.path.splitext(file_path)[0])
+        except FileNotFoundError:
+            st.error(f"File not found: {file_path}. Please make sure the file is uploaded.")
+        except Exception as e:
+            st.error(f"An error occurred while loading the data: {e}")
@@ -1,6 +1,15 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+import charts
+import db_connection
+import instrumentation
+import ingest
+import leaderboards
+import schema_registry
+
+
+# Best-figures fields rank on their numeric sort key
+FIGURES_FIELDS = {"bbi": "bbi_key", "bbm": "bbm_key"}
 
 
 # Must be the first Streamlit command
@@ -10,22 +19,15 @@ import matplotlib.pyplot as plt
 def app():
 
     # ---------------- Load Data ----------------
-    batsmen = pd.read_csv("Batsmen_stats.csv")
-    allrounder_bat = pd.read_csv("All Rounder Batting Stats.csv")
-    bowlers = pd.read_csv("Bowlers_stats.csv")
-    allrounder_bowl = pd.read_csv("All Rounder Bowling Stats.csv")
-
-    # Ensure consistent column naming
-    if "average" in batsmen.columns:
-        batsmen.rename(columns={"average": "avg"}, inplace=True)
-    if "average" in allrounder_bat.columns:
-        allrounder_bat.rename(columns={"average": "avg"}, inplace=True)
-
-    # Merge batting datasets
-    batting_df = pd.concat([batsmen, allrounder_bat], ignore_index=True)
-
-    # Merge bowling datasets
-    bowling_df = pd.concat([bowlers, allrounder_bowl], ignore_index=True)
+    # Per-player totals for every (metric, format) are kept presorted and rebuilt
+    # only when the data changes, so picking a field or format is a lookup
+    version = db_connection.data_version()
+    try:
+        batting_boards = leaderboards.boards("career_batting", version)
+        bowling_boards = leaderboards.boards("career_bowling", version)
+    except schema_registry.SchemaError as e:
+        st.error(f"Cannot load career stats: {e}")
+        return
 
     # ---------------- Career Field Options ----------------
     batting_fields = ["innings", "runs", "balls_faced", "highest_score", "avg", "strike_rate",
@@ -35,6 +37,7 @@ def app():
                       "bbi", "bbm", "4w", "5w", "10w"]
 
     # ---------------- Tabs ----------------
+    # Both tabs' charts are requested before either is shown, so a miss renders them in parallel
     tab1, tab2 = st.tabs(["🏏 Batting", "🎯 Bowling"])
 
     # ---------------- Batting Section ----------------
@@ -42,56 +45,59 @@ def app():
         st.header("Batting Leaderboard")
 
         career_field = st.selectbox("Select Career Field", batting_fields, key="batting_field")
-        formats = batting_df["format"].dropna().unique().tolist()
-        formats.sort()
+        formats = batting_boards["formats"]
         selected_format = st.selectbox("Select Format (optional)", ["All"] + formats, key="batting_format")
 
-        df = batting_df.copy()
-
-        # Apply format filter if selected
-        if selected_format != "All":
-            df = df[df["format"] == selected_format]
-
-        # Group by player and sum the numeric fields
-        top_df = df.groupby("player_name", as_index=False)[career_field].sum()
-        top_df = top_df.sort_values(by=career_field, ascending=False).head(10)
-
-        # Bar chart
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.barh(top_df["player_name"], top_df[career_field], color="skyblue")
-        ax.set_xlabel(career_field.capitalize())
-        ax.set_ylabel("Player")
-        ax.set_title(f"Top 10 Players by {career_field.capitalize()} ({selected_format})")
-        ax.invert_yaxis()
-        st.pyplot(fig)
+        batting_chart = leaderboard_chart(version, batting_boards, "batting_stats", career_field, selected_format, "skyblue")
+        batting_slot = st.empty()
 
     # ---------------- Bowling Section ----------------
     with tab2:
         st.header("Bowling Leaderboard")
 
         career_field = st.selectbox("Select Career Field", bowling_fields, key="bowling_field")
-        formats = bowling_df["format"].dropna().unique().tolist()
-        formats.sort()
+        formats = bowling_boards["formats"]
         selected_format = st.selectbox("Select Format (optional)", ["All"] + formats, key="bowling_format")
 
-        df = bowling_df.copy()
-
-        # Apply format filter if selected
-        if selected_format != "All":
-            df = df[df["format"] == selected_format]
-
-        # Group by player and sum the numeric fields
-        top_df = df.groupby("player_name", as_index=False)[career_field].sum()
-        top_df = top_df.sort_values(by=career_field, ascending=False).head(10)
-
-        # Bar chart
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.barh(top_df["player_name"], top_df[career_field], color="lightgreen")
-        ax.set_xlabel(career_field.capitalize())
-        ax.set_ylabel("Player")
-        ax.set_title(f"Top 10 Players by {career_field.capitalize()} ({selected_format})")
-        ax.invert_yaxis()
-        st.pyplot(fig)
+        bowling_chart = leaderboard_chart(version, bowling_boards, "bowling_stats", career_field, selected_format, "lightgreen")
+        bowling_slot = st.empty()
+
+    with instrumentation.span("Cricket_Analysis.chart_wait"):
+        batting_png, bowling_png = batting_chart.result(), bowling_chart.result()
+    batting_slot.image(batting_png, use_column_width=True)
+    bowling_slot.image(bowling_png, use_column_width=True)
+
+
+def leaderboard_chart(version, boards: dict, dataset: str, career_field: str, selected_format: str, color: str):
+    """Future for the top-10 bar chart PNG, rendered once per (metric, format, data version)."""
+    # The top 10 is read here, on the script thread, so the worker never sees a board mid-update
+    top_df = top_players(boards, dataset, career_field, selected_format)
+    return charts.cached_chart(
+        (dataset, career_field, selected_format, version),
+        lambda: charts.bar_chart_png(
+            top_df["player_name"], top_df[career_field],
+            title=f"Top 10 Players by {career_field.capitalize()} ({selected_format})",
+            xlabel="Wickets" if career_field in FIGURES_FIELDS else career_field.capitalize(),
+            ylabel="Player", color=color,
+        ),
+    )
+
+
+def top_players(boards: dict, dataset: str, career_field: str, selected_format: str, k: int = 10) -> pd.DataFrame:
+    """Top k players by a career field, highest first.
+
+    Best figures are charted by wickets, with the full figures in the label.
+    """
+    board = boards.get((FIGURES_FIELDS.get(career_field, career_field), selected_format))
+    top = leaderboards.top_k(board, k) if board else []
+    names = [boards["names"][player_id] for player_id, _ in top]
+    if career_field in FIGURES_FIELDS:
+        figures = [ingest.figures_from_key(key) for _, key in top]
+        return pd.DataFrame({
+            "player_name": [f"{name} ({wickets}/{runs})" for name, (wickets, runs) in zip(names, figures)],
+            career_field: [wickets for wickets, _ in figures],
+        })
+    return pd.DataFrame({"player_name": names, career_field: [value for _, value in top]})
 
 
 # Launcher
@@ -1,124 +1,221 @@
+import sqlite3
 import streamlit as st
 import pandas as pd
-import os
+import db_connection
+import instrumentation
+import leaderboards
+import player_store
+import write_coordinator
+
+
+@instrumentation.traced
+@st.cache_data(max_entries=1)
+def load_player_records(version):
+    """Players joined with their batting rows; rebuilt only when a write bumps the data version."""
+    with db_connection.connect() as conn:
+        players_df = player_store.load_players(conn)
+        batsmen_df = player_store.load_batsmen_stats(conn)
+    # Merge Players_Data.id with Batsmen_stats.player_id
+    return pd.merge(players_df, batsmen_df, left_on="id", right_on="player_id", how="left")
 
-st.set_page_config(page_title="Cricket Player Management", layout="wide")
 
 def app():
     st.title("🏏 Cricket Player CRUD Application")
 
-    # Load datasets
-    players_file = "Players_Data.csv"
-    batsmen_file = "Batsmen_stats.csv"
-
-    if os.path.exists(players_file) and os.path.exists(batsmen_file):
-        players_df = pd.read_csv(players_file)
-        batsmen_df = pd.read_csv(batsmen_file)
-
-        # Merge Players_Data.id with Batsmen_stats.player_id
-        data = pd.merge(players_df, batsmen_df, left_on="id", right_on="player_id", how="left")
-
-        # Sidebar Navigation
-        crud_action = st.sidebar.radio("Select Action", ["Create", "Read", "Update", "Delete"])
-
-        # CREATE
-        if crud_action == "Create":
-            st.subheader("➕ Add New Player")
-            with st.form("create_form"):
-                player_id = st.text_input("Player ID")  # will go to both id and player_id
-                name = st.text_input("Name")
-                battingStyle = st.selectbox("Batting Style", ["Right-hand bat", "Left-hand bat"])
-                bowlingStyle = st.text_input("Bowling Style")
-                role = st.selectbox("Role", ["BATSMAN", "BOWLER", "ALL ROUNDER"])
-                team_name = st.text_input("Team Name")
-                format_ = st.selectbox("Format", batsmen_df["format"].unique())
-                runs = st.number_input("Runs", min_value=0)
-                average = st.number_input("Average", min_value=0.0)
-                strike_rate = st.number_input("Strike Rate", min_value=0.0)
-
-                submitted = st.form_submit_button("Add Player")
-                if submitted:
-                    # Append new player to Players_Data
-                    new_player = {
-                        "id": player_id,
-                        "name": name,
-                        "battingStyle": battingStyle,
-                        "bowlingStyle": bowlingStyle,
-                        "role": role,
-                        "team_name": team_name
-                    }
-                    players_df = pd.concat([players_df, pd.DataFrame([new_player])], ignore_index=True)
-
-                    # Append new stats to Batsmen_stats
-                    new_stats = {
-                        "player_id": player_id,
-                        "player_name": name,
-                        "format": format_,
-                        "runs": runs,
-                        "average": average,
-                        "strike_rate": strike_rate
-                    }
-                    batsmen_df = pd.concat([batsmen_df, pd.DataFrame([new_stats])], ignore_index=True)
-
-                    players_df.to_csv(players_file, index=False)
-                    batsmen_df.to_csv(batsmen_file, index=False)
-
-                    st.success(f"✅ Player {name} added successfully!")
-
-        # READ
-        elif crud_action == "Read":
-            st.subheader("📖 Player Records")
-            st.dataframe(data)
-
-        # UPDATE
-        elif crud_action == "Update":
-            st.subheader("✏️ Update Player Information")
-            player_ids = players_df["id"].tolist()
-            selected_id = st.selectbox("Select Player ID", player_ids)
-
-            player_row = players_df[players_df["id"] == selected_id].iloc[0]
-            stat_row = batsmen_df[batsmen_df["player_id"] == selected_id].iloc[0]
-
-            with st.form("update_form"):
-                name = st.text_input("Name", player_row["name"])
-                battingStyle = st.text_input("Batting Style", player_row["battingStyle"])
-                bowlingStyle = st.text_input("Bowling Style", player_row["bowlingStyle"])
-                role = st.text_input("Role", player_row["role"])
-                team_name = st.text_input("Team Name", player_row["team_name"])
-                runs = st.number_input("Runs", value=int(stat_row["runs"]))
-                average = st.number_input("Average", value=float(stat_row["average"]))
-                strike_rate = st.number_input("Strike Rate", value=float(stat_row["strike_rate"]))
-
-                submitted = st.form_submit_button("Update Player")
-                if submitted:
-                    # Update Players_Data
-                    players_df.loc[players_df["id"] == selected_id, ["name", "battingStyle", "bowlingStyle", "role", "team_name"]] = [name, battingStyle, bowlingStyle, role, team_name]
-
-                    # Update Batsmen_stats
-                    batsmen_df.loc[batsmen_df["player_id"] == selected_id, ["runs", "average", "strike_rate"]] = [runs, average, strike_rate]
-
-                    players_df.to_csv(players_file, index=False)
-                    batsmen_df.to_csv(batsmen_file, index=False)
-
+    # Only the key lists the forms need are read up front; the joined table is
+    # built when the Read view is opened
+    try:
+        with db_connection.connect() as conn:
+            player_ids = player_store.player_ids(conn)
+            formats = player_store.stat_formats(conn)
+    except sqlite3.Error as e:
+        st.error(f"❌ Could not read player tables: {e}")
+        return
+
+    # Sidebar Navigation
+    crud_action = st.sidebar.radio("Select Action", ["Create", "Bulk Import", "Read", "Update", "Delete"])
+    mirror_csv = st.sidebar.checkbox("Mirror changes to CSV files", value=True,
+                                     help="Rewrites Players_Data.csv and Batsmen_stats.csv in the background.")
+
+    def after_write():
+        if mirror_csv:
+            player_store.schedule_csv_export(player_store.PLAYERS_TABLE, player_store.BATSMEN_TABLE)
+
+    # CREATE
+    if crud_action == "Create":
+        st.subheader("➕ Add New Player")
+        with st.form("create_form"):
+            player_id = st.text_input("Player ID")  # will go to both id and player_id
+            name = st.text_input("Name")
+            battingStyle = st.selectbox("Batting Style", ["Right-hand bat", "Left-hand bat"])
+            bowlingStyle = st.text_input("Bowling Style")
+            role = st.selectbox("Role", ["BATSMAN", "BOWLER", "ALL ROUNDER"])
+            team_name = st.text_input("Team Name")
+            format_ = st.selectbox("Format", formats)
+            runs = st.number_input("Runs", min_value=0)
+            average = st.number_input("Average", min_value=0.0)
+            strike_rate = st.number_input("Strike Rate", min_value=0.0)
+
+            submitted = st.form_submit_button("Add Player")
+            if submitted:
+                # Insert a single row into each table
+                new_player = {
+                    "id": int(player_id) if player_id.strip().isdigit() else None,
+                    "name": name,
+                    "battingStyle": battingStyle,
+                    "bowlingStyle": bowlingStyle,
+                    "role": role,
+                    "team_name": team_name
+                }
+                new_stats = {
+                    "format": format_,
+                    "runs": runs,
+                    "average": average,
+                    "strike_rate": strike_rate
+                }
+                if new_player["id"] is None:
+                    st.error("❌ Player ID must be a whole number.")
+                else:
+                    try:
+                        with db_connection.write_connection() as conn:
+                            player_store.add_player(conn, new_player, new_stats)
+                        after_write()
+                        st.success(f"✅ Player {name} added successfully!")
+                    except sqlite3.IntegrityError as e:
+                        # The message names the unique key that collided
+                        if player_store.BATSMEN_TABLE in str(e):
+                            st.error(f"❌ Player ID {new_player['id']} already has {format_} stats; "
+                                     "edit them under Update instead.")
+                        else:
+                            st.error(f"❌ Player ID {new_player['id']} already exists for team {team_name}.")
+
+    # BULK IMPORT
+    elif crud_action == "Bulk Import":
+        st.subheader("📥 Bulk Import Players")
+        st.caption("Upload a CSV or JSON roster with columns id, name, role and optionally battingStyle, "
+                   "bowlingStyle, team_name, format, runs, average, strike_rate (one row per player and format).")
+        upload = st.file_uploader("Roster file", type=["csv", "json"])
+        if upload is not None:
+            try:
+                if upload.name.lower().endswith(".json"):
+                    try:
+                        rows = pd.read_json(upload)
+                    except ValueError:
+                        upload.seek(0)
+                        rows = pd.read_json(upload, lines=True)
+                else:
+                    rows = pd.read_csv(upload)
+                valid, rejected = player_store.validate_import(rows, player_ids, formats)
+            except ValueError as e:
+                st.error(f"❌ Could not read {upload.name}: {e}")
+                return
+
+            c1, c2 = st.columns(2)
+            c1.metric("Valid rows", len(valid))
+            c2.metric("Rejected rows", len(rejected))
+            if not rejected.empty:
+                st.markdown("**Rejected rows**")
+                st.dataframe(rejected, use_container_width=True)
+            if not valid.empty and st.button(f"Import {len(valid)} rows"):
+                try:
+                    with db_connection.write_connection() as conn:
+                        player_store.import_players(conn, valid)
+                    after_write()
+                    st.success(f"✅ Imported {valid['id'].nunique()} players in one transaction.")
+                except sqlite3.IntegrityError as e:
+                    st.error(f"❌ Import rolled back, nothing was saved: {e}")
+
+    # READ
+    elif crud_action == "Read":
+        st.subheader("📖 Player Records")
+        st.dataframe(load_player_records(db_connection.data_version()))
+
+    # UPDATE
+    elif crud_action == "Update":
+        st.subheader("✏️ Update Player Information")
+        selected_id = st.selectbox("Select Player ID", player_ids)
+        with db_connection.connect() as conn:
+            teams = player_store.player_teams(conn, selected_id)
+        if not teams:
+            st.warning(f"⚠️ Player {selected_id} was removed by someone else.")
+            return
+        # A player listed for several teams has one row per team; the team picked here
+        # is the one whose name the form changes (name, styles and role apply to all)
+        selected_team = st.selectbox("Team", teams) if len(teams) > 1 else teams[0]
+        selected_format = st.selectbox("Format", formats)
+
+        with db_connection.connect() as conn:
+            player_row = player_store.get_player(conn, selected_id, selected_team)
+            stat_row = player_store.get_stats(conn, selected_id, selected_format)
+        stat_values = stat_row or {}
+
+        # The rows as rendered on the previous run are what the editor actually saw;
+        # the update only applies if the database still holds exactly those values
+        loaded = st.session_state.get("crud_update_loaded")
+        if loaded and loaded[:3] == (selected_id, selected_team, selected_format):
+            seen_player, seen_stats = loaded[3], loaded[4]
+        else:
+            seen_player, seen_stats = player_row, stat_row
+
+        with st.form("update_form"):
+            name = st.text_input("Name", player_row["name"])
+            battingStyle = st.text_input("Batting Style", player_row["battingStyle"])
+            bowlingStyle = st.text_input("Bowling Style", player_row["bowlingStyle"])
+            role = st.text_input("Role", player_row["role"])
+            team_name = st.text_input("Team Name", player_row["team_name"], help="Changes only the team picked above")
+            if stat_row is None:
+                st.caption(f"No {selected_format} stats for this player yet; saving adds them.")
+            runs = st.number_input("Runs", value=int(stat_values.get("runs") or 0))
+            average = st.number_input("Average", value=float(stat_values.get("average") or 0))
+            strike_rate = st.number_input("Strike Rate", value=float(stat_values.get("strike_rate") or 0))
+
+            submitted = st.form_submit_button("Update Player")
+            if submitted:
+                player = {"name": name, "battingStyle": battingStyle, "bowlingStyle": bowlingStyle,
+                          "role": role, "team_name": team_name}
+                stats = {"runs": runs, "average": average, "strike_rate": strike_rate}
+                try:
+                    with db_connection.write_connection() as conn:
+                        player_store.update_player(conn, selected_id, seen_player, player, selected_format, seen_stats, stats)
+                        selected_team = team_name
+                        player_row = player_store.get_player(conn, selected_id, selected_team)
+                        stat_row = player_store.get_stats(conn, selected_id, selected_format)
+                    after_write()
                     st.success(f"✅ Player {name} updated successfully!")
-
-        # DELETE
-        elif crud_action == "Delete":
-            st.subheader("🗑️ Delete Player")
-            player_ids = players_df["id"].tolist()
-            selected_id = st.selectbox("Select Player ID to Delete", player_ids)
-
-            if st.button("Delete Player"):
-                players_df = players_df[players_df["id"] != selected_id]
-                batsmen_df = batsmen_df[batsmen_df["player_id"] != selected_id]
-
-                players_df.to_csv(players_file, index=False)
-                batsmen_df.to_csv(batsmen_file, index=False)
-
+                except sqlite3.IntegrityError:
+                    st.error(f"❌ Player ID {selected_id} already has a record for team {team_name}.")
+                except write_coordinator.ConflictError as e:
+                    st.warning(f"⚠️ {e} since this form was loaded. Nothing was saved; the form now shows the latest values.")
+
+        st.session_state["crud_update_loaded"] = (selected_id, selected_team, selected_format, player_row, stat_row)
+
+        # Standing among all players in this format; boards are patched by each write, not rebuilt
+        st.markdown(f"**Standing in {selected_format}**")
+        boards = leaderboards.boards("crud_batting", db_connection.data_version())
+        for col, field in zip(st.columns(len(player_store.STAT_FIELDS)), player_store.STAT_FIELDS):
+            board = boards.get((field, selected_format))
+            standing = leaderboards.rank(board, selected_id) if board else None
+            if standing:
+                position, percentile, size = standing
+                col.metric(field.replace("_", " ").title(), f"#{position} of {size}", f"ahead of {percentile:.0f}%",
+                           delta_color="off")
+            else:
+                col.metric(field.replace("_", " ").title(), "—")
+
+    # DELETE
+    elif crud_action == "Delete":
+        st.subheader("🗑️ Delete Player")
+        selected_id = st.selectbox("Select Player ID to Delete", player_ids)
+
+        if st.button("Delete Player"):
+            try:
+                with db_connection.write_connection() as conn:
+                    player_store.delete_player(conn, selected_id)
+                after_write()
                 st.success(f"✅ Player with ID {selected_id} deleted successfully!")
+            except write_coordinator.ConflictError as e:
+                st.warning(f"⚠️ {e}.")
 
-    else:
-        st.error("❌ Players_Data.csv or Batsmen_stats.csv not found!")
 
 
 
@@ -1,95 +1,27 @@
 import streamlit as st
 import pandas as pd
-from pathlib import Path
+import db_connection
+import instrumentation
+import percentiles
+import player_search
+import player_similarity
+import profile_bundles
+import schema_registry
 
 # st.set_page_config(page_title="Cricket Player Profiles", layout="wide")
 
+# Percentile badges shown per format: metric -> label
+BATTING_BADGES = {'runs': 'Runs', 'avg': 'Average', 'strike_rate': 'Strike rate', 'hundreds': '100s', 'sixes': 'Sixes'}
+BOWLING_BADGES = {'wickets': 'Wickets', 'avg': 'Average', 'eco': 'Economy', 'sr': 'Strike rate', 'bbi_key': 'Best innings'}
+
 def app():
 
     # --- Helper utilities -------------------------------------------------
-    def read_csv_robust(path: Path) -> pd.DataFrame:
-        try:
-            df = pd.read_csv(path)
-            return df
-        except FileNotFoundError:
-            st.error(f"File not found: {path}")
-            return pd.DataFrame()
-        except Exception as e:
-            st.error(f"Error reading {path}: {e}")
-            return pd.DataFrame()
-
-    def find_name_col(df: pd.DataFrame) -> str:
-        candidates = [c for c in df.columns if c.lower() in ("player", "player_name", "name")]
-        if candidates:
-            return candidates[0]
-        for c in df.columns:
-            if 'name' in c.lower() or 'player' in c.lower():
-                return c
-        return df.columns[0] if len(df.columns) > 0 else None
-
-    def find_format_col(df: pd.DataFrame) -> str:
-        candidates = [c for c in df.columns if c.lower() == 'format']
-        if candidates:
-            return candidates[0]
-        for c in df.columns:
-            if 'format' in c.lower():
-                return c
-        return None
-
-    def pivot_stats_for_player(df: pd.DataFrame, player_col: str, player_name: str, format_col: str) -> pd.DataFrame:
-        if df.empty:
-            return pd.DataFrame()
-        filtered = df[df[player_col].astype(str).str.lower() == player_name.lower()].copy()
-        if filtered.empty:
-            return pd.DataFrame()
-        # Drop ID column if present
-        drop_cols = [c for c in filtered.columns if 'id' in c.lower()]
-        filtered = filtered.drop(columns=drop_cols, errors='ignore')
-        value_cols = [c for c in filtered.columns if c not in (player_col, format_col)]
-        numeric_cols = []
-        for c in value_cols:
-            try:
-                converted = pd.to_numeric(filtered[c], errors='coerce')
-                if converted.notna().any():
-                    numeric_cols.append(c)
-            except Exception:
-                continue
-        if numeric_cols:
-            pivot = filtered.groupby(format_col)[numeric_cols].agg(lambda s: s.astype(float).round(2).astype(object)).reset_index()
-            pivot = pivot.set_index(format_col)
-            return pivot
-        else:
-            grouped = filtered.groupby(format_col).agg(lambda s: ' | '.join(s.astype(str).unique()))
-            return grouped
-
-    def display_player_basic_info(players_df: pd.DataFrame, player_name: str):
-        cols_required = ['id', 'name', 'battingStyle', 'bowlingStyle', 'role', 'team_name']
-        col_map = {}
-        for req in cols_required:
-            match = None
-            for c in players_df.columns:
-                if c.lower() == req.lower():
-                    match = c
-                    break
-            col_map[req] = match
-
-        name_col = None
-        for c in players_df.columns:
-            if c.lower() in ('name', 'player', 'player_name'):
-                name_col = c
-                break
-        if name_col is None:
-            name_col = players_df.columns[0]
-
-        filtered = players_df[players_df[name_col].astype(str).str.lower() == player_name.lower()]
-        if filtered.empty:
+    def display_player_basic_info(info_df: pd.DataFrame, player_name: str):
+        if info_df is None:
             st.warning(f"No metadata found for player: {player_name}")
             return
 
-        display_cols = [col_map[r] for r in cols_required if col_map[r] is not None]
-        info_df = filtered[display_cols].drop_duplicates().reset_index(drop=True)
-        info_df.columns = [c.replace('_', ' ').title() for c in info_df.columns]
-
         st.markdown("**Player Information**")
         for idx, row in info_df.iterrows():
             c1, c2, c3 = st.columns([1,1,1])
@@ -109,98 +41,168 @@ def app():
             st.markdown(f"**Role:** {row.get('Role', '')}")
             st.markdown("---")
 
-    @st.cache_data
-    def load_all_data():
+    def display_percentile_badges(pivot: pd.DataFrame, badges: dict, label: str):
+        if pivot is None:
+            st.caption(f"Not ranked for {label.lower()} yet: too few innings in every format.")
+            return
+        st.markdown(f"**{label} percentiles** (P90 = ahead of 90% of qualified players in that format)")
+        for format_, row in pivot.iterrows():
+            parts = []
+            for metric, name in badges.items():
+                value = row.get(metric)
+                if value is None or pd.isna(value):
+                    continue
+                color = ('violet' if value >= 90 else 'green' if value >= 75 else 'blue' if value >= 50
+                         else 'orange' if value >= 25 else 'red')
+                parts.append(f":{color}-background[{name} P{value:.0f}]")
+            st.markdown(f"**{format_}** &nbsp; " + " ".join(parts))
+
+    @instrumentation.traced
+    @st.cache_data(max_entries=1)
+    def load_all_data(version):
         datasets = {}
-        datasets['batsmen'] = read_csv_robust('Batsmen_stats.csv')
-        datasets['bowlers'] = read_csv_robust('Bowlers_stats.csv')
-        datasets['allrounder_bat'] = read_csv_robust('All Rounder Batting Stats.csv')
-        datasets['allrounder_bowl'] = read_csv_robust('All Rounder Bowling Stats.csv')
-        datasets['players'] = read_csv_robust('Players_Data.csv')
+        with db_connection.connect() as conn:
+            datasets['batsmen'] = schema_registry.load('batting_stats', conn, {'source': 'batsman'})
+            datasets['bowlers'] = schema_registry.load('bowling_stats', conn, {'source': 'bowler'})
+            datasets['allrounder_bat'] = schema_registry.load('batting_stats', conn, {'source': 'all_rounder'})
+            datasets['allrounder_bowl'] = schema_registry.load('bowling_stats', conn, {'source': 'all_rounder'})
+            datasets['players'] = schema_registry.load('players', conn)
+            datasets['batting_pct'] = percentiles.load('batting_stats', conn)
+            datasets['bowling_pct'] = percentiles.load('bowling_stats', conn)
         return datasets
 
-    datasets = load_all_data()
+    @instrumentation.traced
+    @st.cache_resource(max_entries=1)
+    def load_search_indexes(version):
+        datasets = load_all_data(version)
+        allrounders = pd.concat([datasets['allrounder_bat'], datasets['allrounder_bowl']], ignore_index=True)
+        return {
+            'BATSMAN': player_search.build_search_index(datasets['batsmen']),
+            'BOWLER': player_search.build_search_index(datasets['bowlers']),
+            'ALL ROUNDER': player_search.build_search_index(allrounders),
+        }
+
+    @instrumentation.traced
+    @st.cache_resource(max_entries=1)
+    def load_similarity_indexes(version):
+        """Per-role normalized feature matrices, rebuilt only when the data version changes."""
+        datasets = load_all_data(version)
+        bat_metrics = schema_registry.columns('batting_stats').metrics
+        bowl_metrics = schema_registry.columns('bowling_stats').metrics
+        return {
+            'BATSMAN': player_similarity.build_similarity_index([(datasets['batsmen'], bat_metrics)]),
+            'BOWLER': player_similarity.build_similarity_index([(datasets['bowlers'], bowl_metrics)]),
+            'ALL ROUNDER': player_similarity.build_similarity_index(
+                [(datasets['allrounder_bat'], bat_metrics), (datasets['allrounder_bowl'], bowl_metrics)]),
+        }
+
+    @instrumentation.traced
+    @st.cache_resource(max_entries=1)
+    def load_profile_bundles(version):
+        """Every player's info and per-format pivots, rebuilt only when the data version changes."""
+        datasets = load_all_data(version)
+        bat_cols = schema_registry.columns('batting_stats')
+        bowl_cols = schema_registry.columns('bowling_stats')
+        stats = {}
+        for key, cols in (('batsmen', bat_cols), ('bowlers', bowl_cols),
+                          ('allrounder_bat', bat_cols), ('allrounder_bowl', bowl_cols)):
+            stats[key] = profile_bundles.pivot_by_player(datasets[key], cols.id, cols.format, cols.metrics)
+        stats['batting_pct'] = profile_bundles.pivot_by_player(datasets['batting_pct'], 'player_id', 'format',
+                                                               list(BATTING_BADGES))
+        stats['bowling_pct'] = profile_bundles.pivot_by_player(datasets['bowling_pct'], 'player_id', 'format',
+                                                               list(BOWLING_BADGES))
+        player_cols = schema_registry.columns('players')
+        players_info = profile_bundles.player_info_by_id(datasets['players'], player_cols.id, player_cols.all)
+        return profile_bundles.build_profile_bundles(players_info, stats)
+
+    version = db_connection.data_version()
+    try:
+        datasets = load_all_data(version)
+    except schema_registry.SchemaError as e:
+        st.error(f"Cannot load player data: {e}")
+        st.stop()
+    search_indexes = load_search_indexes(version)
+    similarity_indexes = load_similarity_indexes(version)
+    bundles = load_profile_bundles(version)
 
     st.title("Cricket Player Profiles")
     st.markdown("Select a role and a player to view their profile and pivoted statistics.")
 
     role = st.selectbox("Select Role", options=["BATSMAN", "BOWLER", "ALL ROUNDER"], index=0)
 
-    if role == 'BATSMAN':
-        df_role = datasets['batsmen']
-    elif role == 'BOWLER':
-        df_role = datasets['bowlers']
-    else:
-        df_role = pd.concat([datasets['allrounder_bat'], datasets['allrounder_bowl']], ignore_index=True, sort=False)
+    index = search_indexes[role]
 
-    player_col = find_name_col(df_role) if not df_role.empty else None
-    player_list = []
-    if player_col:
-        player_list = sorted(df_role[player_col].dropna().astype(str).unique(), key=lambda s: s.lower())
+    search = st.text_input("Search Player", placeholder="Type part of a name, typos are fine")
+    player_ids = player_search.search_players(index, search, limit=20 if search else None)
 
-    if not player_list:
-        st.warning("No players found for the selected role or data file is missing.")
+    if not player_ids:
+        if search:
+            st.warning(f"No players match '{search}'.")
+        else:
+            st.warning("No players found for the selected role or data file is missing.")
         st.stop()
 
-    player_name = st.selectbox("PlayerName", options=player_list)
+    player_id = st.selectbox("PlayerName", options=player_ids, format_func=lambda pid: index['names'][pid])
+    player_name = index['names'][player_id]
 
-    players_df = datasets['players']
-    if players_df.empty:
-        st.error("Players_Data.csv is missing or empty. Cannot display player metadata.")
-    else:
-        display_player_basic_info(players_df, player_name)
+    # A single keyed read: everything shown below was prepared when the bundles were built
+    bundle = bundles.get(player_id, {})
+
+    display_player_basic_info(bundle.get('info'), player_name)
 
     st.markdown("## Statistics")
 
-    format_col = find_format_col(df_role) if not df_role.empty else None
+    # Ranks were computed when the data last changed; showing them is a dictionary read
+    if role in ('BATSMAN', 'ALL ROUNDER'):
+        display_percentile_badges(bundle.get('batting_pct'), BATTING_BADGES, 'Batting')
+    if role in ('BOWLER', 'ALL ROUNDER'):
+        display_percentile_badges(bundle.get('bowling_pct'), BOWLING_BADGES, 'Bowling')
 
     if role == 'BATSMAN':
-        stats_df = datasets['batsmen']
-        p = pivot_stats_for_player(stats_df, player_col, player_name, format_col)
-        if p.empty:
-            st.info("No batting statistics available for this player in Batsmen_stats.csv")
+        p = bundle.get('batsmen')
+        if p is None:
+            st.info("No batting statistics available for this player in the batting stats")
         else:
             st.markdown("**Batting Stats (by Format)**")
             st.dataframe(p)
 
     elif role == 'BOWLER':
-        stats_df = datasets['bowlers']
-        p = pivot_stats_for_player(stats_df, player_col, player_name, format_col)
-        if p.empty:
-            st.info("No bowling statistics available for this player in Bowlers_stats.csv")
+        p = bundle.get('bowlers')
+        if p is None:
+            st.info("No bowling statistics available for this player in the bowling stats")
         else:
             st.markdown("**Bowling Stats (by Format)**")
             st.dataframe(p)
 
     else:  # ALL ROUNDER
-        bat_df = datasets['allrounder_bat']
-        bat_player_col = find_name_col(bat_df) if not bat_df.empty else None
-        bat_format_col = find_format_col(bat_df) if not bat_df.empty else None
-        pbat = pivot_stats_for_player(bat_df, bat_player_col, player_name, bat_format_col)
-        if pbat.empty:
-            st.info("No allrounder batting stats available for this player in All Rounder Batting Stats.csv")
+        pbat = bundle.get('allrounder_bat')
+        if pbat is None:
+            st.info("No allrounder batting stats available for this player in the all-rounder batting stats")
         else:
             st.markdown("**All-Rounder Batting Stats (by Format)**")
             st.dataframe(pbat)
 
         st.markdown("---")
 
-        bowl_df = datasets['allrounder_bowl']
-        bowl_player_col = find_name_col(bowl_df) if not bowl_df.empty else None
-        bowl_format_col = find_format_col(bowl_df) if not bowl_df.empty else None
-        pbowl = pivot_stats_for_player(bowl_df, bowl_player_col, player_name, bowl_format_col)
-        if pbowl.empty:
-            st.info("No allrounder bowling stats available for this player in All Rounder Bowling Stats.csv")
+        pbowl = bundle.get('allrounder_bowl')
+        if pbowl is None:
+            st.info("No allrounder bowling stats available for this player in the all-rounder bowling stats")
         else:
             st.markdown("**All-Rounder Bowling Stats (by Format)**")
             st.dataframe(pbowl)
 
     st.markdown("---")
 
+    st.markdown(f"## Players like {player_name}")
+    k = st.slider("Number of similar players", min_value=1, max_value=20, value=5)
+    similar = player_similarity.similar_players(similarity_indexes[role], player_id, k)
+    if not similar:
+        st.info("Not enough statistics to compare this player.")
+    else:
+        st.dataframe(pd.DataFrame({
+            'Player': [index['names'].get(pid, pid) for pid, _ in similar],
+            'Similarity': [round(score, 3) for _, score in similar],
+        }), hide_index=True)
+
 if __name__ == "__main__":
     app()
-
-
-
-
-
@@ -1,39 +1,63 @@
+import datetime
 import streamlit as st
-import sqlite3
 import pandas as pd
+import data_export
+import db_connection
+import instrumentation
+import query_pager
+import query_profiler
 
-def app():
-    # ==========================
-    # Database configuration
-    # ==========================
-    DB_PATH = "CricBuzz_database.db"
+FORMATS = ["Test", "ODI", "T20", "IPL"]
 
+def app():
     # ==========================
     # Queries dictionary
     # ==========================
+    # Values are bound as named parameters (:name), never formatted into the SQL,
+    # so each template compiles once and stays in the pooled read connections' statement caches.
     QUERIES = {
-        "Indian Players Details": """
+        "Players Details by Team": """
             SELECT name, role, battingStyle, bowlingStyle
             FROM cricket_player_data
-            WHERE team_name = 'India';
+            WHERE team_name = :team;
         """,
 
-        "Top 10 Highest Run Scorers in ODI": """
-            SELECT player_name, runs AS total_runs, average AS batting_average, hundreds AS number_of_centuries
-            FROM (
-                SELECT player_name, format, runs, average, hundreds FROM all_batsmen_stats
-                UNION ALL
-                SELECT player_name, format, runs, avg AS average, hundreds FROM all_rounders_batting_stats
-            ) AS combined_stats
-            WHERE format = 'ODI'
+        "Top Run Scorers by Format": """
+            SELECT player_name, runs AS total_runs, avg AS batting_average, hundreds AS number_of_centuries
+            FROM batting_stats
+            WHERE format = :format
             ORDER BY runs DESC
-            LIMIT 10;
+            LIMIT :top_n;
         """,
 
-        "Venues with Capacity > 50,000": """
+        "Best Bowling Figures by Format": """
+            SELECT player_name, bbi AS best_innings, bbm AS best_match, wickets AS total_wickets
+            FROM bowling_stats
+            WHERE format = :format AND bbi_key IS NOT NULL
+            ORDER BY bbi_key DESC
+            LIMIT :top_n;
+        """,
+
+        "Boundary Hitters by Format": """
+            SELECT player_name, boundary_run_pct, boundaries_per_innings, runs_per_innings, balls_per_dismissal
+            FROM batting_metrics
+            WHERE format = :format AND source = 'batsman' AND dismissals >= :min_dismissals
+            ORDER BY boundary_run_pct DESC
+            LIMIT :top_n;
+        """,
+
+        "Strike Bowlers by Format": """
+            SELECT player_name, wickets_per_innings, haul_rate_pct, maiden_ball_pct, balls_per_innings
+            FROM bowling_metrics
+            WHERE format = :format AND source = 'bowler'
+            ORDER BY wickets_per_innings DESC
+            LIMIT :top_n;
+        """,
+
+        "Venues by Minimum Capacity": """
             SELECT ground AS venue_name, city, country, capacity
             FROM venue_info
-            WHERE capacity > 50000
+            WHERE capacity > :min_capacity
             ORDER BY capacity DESC;
         """,
 
@@ -45,33 +69,40 @@ def app():
 
         "Highest Individual Batting Score per Format": """
             SELECT format, MAX(highest_score) AS highest_score
-            FROM (
-                SELECT format, highest_score FROM all_batsmen_stats
-                UNION ALL
-                SELECT format, high_score AS highest_score FROM all_rounders_batting_stats
-            ) AS combined_stats
+            FROM batting_stats
             WHERE format IN ('Test', 'ODI', 'T20','IPL')
             GROUP BY format;
         """,
 
-        "Cricket Series in 2024": """
+        "Cricket Series by Year": """
             SELECT name AS series_name, series_type AS match_type, start_date
-            FROM all_cricket_series
-            WHERE STRFTIME('%Y', start_date) = '2024';
+            FROM series_calendar
+            WHERE start_day >= CAST(STRFTIME('%s', :year || '-01-01') AS INTEGER) / 86400
+              AND start_day < CAST(STRFTIME('%s', (:year + 1) || '-01-01') AS INTEGER) / 86400
+            ORDER BY start_day;
+        """,
+
+        "Cricket Series Overlapping Dates": """
+            SELECT c.name AS series_name, c.series_type AS match_type, c.start_date, c.end_date
+            FROM series_intervals i
+            JOIN series_calendar c ON c.id = i.id
+            WHERE i.start_day <= CAST(STRFTIME('%s', :to_date) AS INTEGER) / 86400
+              AND i.end_day >= CAST(STRFTIME('%s', :from_date) AS INTEGER) / 86400
+            ORDER BY c.start_day;
         """,
 
         "Really Good All-Rounders": """
             SELECT b.player_name, b.runs AS total_runs, w.wickets AS total_wickets, b.format
-            FROM all_rounders_batting_stats b
-            JOIN all_rounders_bowling_stats w
-              ON b.player_id = w.player_id AND b.format = w.format
-            WHERE b.runs > 1000 AND w.wickets > 50;
+            FROM batting_stats b
+            JOIN bowling_stats w
+              ON b.player_id = w.player_id AND b.format = w.format AND w.source = 'all_rounder'
+            WHERE b.source = 'all_rounder' AND b.runs > :min_runs AND w.wickets > :min_wickets;
         """,
 
         "Player Match Counts and Batting Averages Across Formats (Min 20 Matches)": """
             WITH format_summary AS (
-                SELECT player_name, format, SUM(matches) AS matches, AVG(average) AS batting_avg
-                FROM Overall_batsman_stats
+                SELECT player_name, format, SUM(matches) AS matches, AVG(avg) AS batting_avg
+                FROM batting_stats
                 WHERE format IN ('Test', 'ODI', 'T20')
                 GROUP BY player_name, format
             ),
@@ -80,7 +111,7 @@ def app():
                     player_name,
                     MAX(CASE WHEN format = 'Test' THEN matches END) AS matches_Test,
                     MAX(CASE WHEN format = 'ODI' THEN matches END) AS matches_ODI,
-                    MAX(CASE WHEN format = 'T20' THEN matches_T20,
+                    MAX(CASE WHEN format = 'T20' THEN matches END) AS matches_T20,
                     MAX(CASE WHEN format = 'Test' THEN batting_avg END) AS avg_Test,
                     MAX(CASE WHEN format = 'ODI' THEN batting_avg END) AS avg_ODI,
                     MAX(CASE WHEN format = 'T20' THEN batting_avg END) AS avg_T20
@@ -96,18 +127,24 @@ def app():
 
         "Comprehensive Player Performance Ranking": """
             WITH batting AS (
-                SELECT player_id, player_name, SUM(runs) AS total_runs,
-                       AVG(avg) AS batting_avg, AVG(strike_rate) AS strike_rate,
-                       (SUM(runs) * 0.01) + (AVG(avg) * 0.5) + (AVG(strike_rate) * 0.3) AS batting_points
-                FROM all_rounders_batting_stats
-                GROUP BY player_id, player_name
+                SELECT b.player_id, b.player_name, SUM(b.runs) AS total_runs,
+                       AVG(b.avg) AS batting_avg, AVG(b.strike_rate) AS strike_rate,
+                       m.batting_points
+                FROM batting_stats b
+                JOIN batting_metrics m
+                  ON m.player_id = b.player_id AND m.source = b.source AND m.format = 'All'
+                WHERE b.source = 'all_rounder'
+                GROUP BY b.player_id, b.player_name
             ),
             bowling AS (
-                SELECT player_id, player_name, SUM(wickets) AS total_wickets,
-                       AVG(avg) AS bowling_avg, AVG(eco) AS economy,
-                       (SUM(wickets) * 2) + ((50 - AVG(avg)) * 0.5) + ((6 - AVG(eco)) * 2) AS bowling_points
-                FROM all_rounders_bowling_stats
-                GROUP BY player_id, player_name
+                SELECT b.player_id, b.player_name, SUM(b.wickets) AS total_wickets,
+                       AVG(b.avg) AS bowling_avg, AVG(b.eco) AS economy,
+                       m.bowling_points
+                FROM bowling_stats b
+                JOIN bowling_metrics m
+                  ON m.player_id = b.player_id AND m.source = b.source AND m.format = 'All'
+                WHERE b.source = 'all_rounder'
+                GROUP BY b.player_id, b.player_name
             ),
             bat_left AS (
                 SELECT b.player_id, b.player_name, b.total_runs, b.batting_avg, b.strike_rate,
@@ -132,19 +169,116 @@ def app():
         """
     }
 
+    # ==========================
+    # Query parameters
+    # ==========================
+    QUERY_PARAMS = {
+        "Players Details by Team": {
+            "team": {"label": "Team", "default": "India",
+                     "options_sql": "SELECT DISTINCT team_name FROM cricket_player_data ORDER BY team_name"},
+        },
+        "Top Run Scorers by Format": {
+            "format": {"label": "Format", "default": "ODI", "options": FORMATS},
+            "top_n": {"label": "Number of players", "default": 10, "min_value": 1},
+        },
+        "Best Bowling Figures by Format": {
+            "format": {"label": "Format", "default": "ODI", "options": FORMATS},
+            "top_n": {"label": "Number of players", "default": 10, "min_value": 1},
+        },
+        "Boundary Hitters by Format": {
+            "format": {"label": "Format (or All)", "default": "ODI", "options": FORMATS + ["All"]},
+            "min_dismissals": {"label": "Minimum dismissals", "default": 10, "min_value": 0},
+            "top_n": {"label": "Number of players", "default": 10, "min_value": 1},
+        },
+        "Strike Bowlers by Format": {
+            "format": {"label": "Format (or All)", "default": "ODI", "options": FORMATS + ["All"]},
+            "top_n": {"label": "Number of players", "default": 10, "min_value": 1},
+        },
+        "Venues by Minimum Capacity": {
+            "min_capacity": {"label": "Capacity greater than", "default": 50000, "min_value": 0, "step": 5000},
+        },
+        "Cricket Series by Year": {
+            "year": {"label": "Year", "default": 2024, "min_value": 1877},
+        },
+        "Cricket Series Overlapping Dates": {
+            "from_date": {"label": "From", "default": "2025-09-01", "type": "date"},
+            "to_date": {"label": "To", "default": "2025-09-30", "type": "date"},
+        },
+        "Really Good All-Rounders": {
+            "min_runs": {"label": "Runs greater than", "default": 1000, "min_value": 0, "step": 100},
+            "min_wickets": {"label": "Wickets greater than", "default": 50, "min_value": 0, "step": 5},
+        },
+    }
+
     # ==========================
     # Helper function
     # ==========================
-    def run_query(query: str) -> pd.DataFrame:
-        """Execute SQL query and return results as DataFrame."""
+    @instrumentation.traced
+    def run_query(query: str, query_name: str, params: dict, page: int = None, page_size: int = 50) -> tuple:
+        """Execute SQL query (or one page of it) and return DataFrame, cost stats, row count and page.
+
+        A page past the end of the result (e.g. after a parameter change
+        shrank it) is clamped to the last page before it is read.
+        """
         try:
-            conn = sqlite3.connect(DB_PATH)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            return df
+            with db_connection.connect() as conn:
+                if page is None:
+                    df, stats = query_profiler.profile_query(conn, query, params)
+                    total = (len(df), True)
+                else:
+                    total = query_pager.estimate_row_count(conn, query, params)
+                    if total[1]:
+                        page = min(page, max(0, -(-total[0] // page_size) - 1))
+                    sql, page_params = query_pager.page_query(query, params, page, page_size)
+                    df, stats = query_profiler.profile_query(conn, sql, page_params)
+            query_profiler.log_query_metrics(query_name, stats)
+            return df, stats, total, page
         except Exception as e:
             st.error(f"Error executing query: {e}")
-            return pd.DataFrame()
+            return pd.DataFrame(), None, (0, True), page
+
+    def param_inputs(query_name: str) -> dict:
+        """Render one widget per template parameter and return the bound values."""
+        values = {}
+        for name, spec in QUERY_PARAMS.get(query_name, {}).items():
+            key = f"param_{query_name}_{name}"
+            if "options_sql" in spec or "options" in spec:
+                options = spec.get("options")
+                if options is None:
+                    with db_connection.connect() as conn:
+                        options = [r[0] for r in conn.execute(spec["options_sql"]) if r[0] is not None]
+                index = options.index(spec["default"]) if spec["default"] in options else 0
+                values[name] = st.selectbox(spec["label"], options, index=index, key=key)
+            elif spec.get("type") == "date":
+                # Bound as an ISO date string, the format the series tables store
+                values[name] = st.date_input(spec["label"], value=datetime.date.fromisoformat(spec["default"]),
+                                             key=key).isoformat()
+            else:
+                values[name] = st.number_input(spec["label"], value=spec["default"], min_value=spec.get("min_value"),
+                                               step=spec.get("step", 1), key=key)
+        return values
+
+    def set_page(page: int):
+        st.session_state["explorer_page"] = page
+
+    def show_query_cost(query_name: str, stats: dict):
+        """Collapsible panel with the plan, timing and size of the last run."""
+        with st.expander("Query plan & cost"):
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Wall-clock", f"{stats['elapsed_ms']:.1f} ms")
+            c2.metric("Rows scanned (est.)", stats["rows_scanned_est"])
+            c3.metric("Rows returned", stats["rows_returned"])
+            c4.metric("Result size", f"{stats['result_bytes'] / 1024:.1f} KB")
+            st.caption(f"SQLite VM steps: {stats['vm_steps']}")
+            if stats["full_scans"]:
+                st.warning(f"Full table scan on: {stats['full_scans']}")
+            st.code(stats["plan"], language="text")
+
+            history = query_profiler.load_query_metrics(query_name)
+            if len(history) > 1:
+                st.markdown("**Run history**")
+                st.line_chart(history.set_index("executed_at")[["elapsed_ms"]])
+                st.dataframe(history, use_container_width=True)
 
     # ==========================
     # UI
@@ -156,8 +290,54 @@ def app():
     st.subheader("Query to be executed:")
     st.code(QUERIES[query_choice], language="sql")
 
+    params = param_inputs(query_choice)
+    if params:
+        st.caption("Bound parameters: " + ", ".join(f":{k} = {v!r}" for k, v in params.items()))
+
+    c1, c2 = st.columns([1, 1])
+    with c1:
+        paginate = st.toggle("Paginate results", value=True)
+    with c2:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 500], index=1, disabled=not paginate)
+
     if st.button("Run Query"):
-        df = run_query(QUERIES[query_choice])
+        st.session_state["explorer_query"] = query_choice
+        st.session_state["explorer_page"] = 0
+        st.session_state.pop("explorer_result", None)
+
+    # Keep showing the last run query so page navigation survives reruns
+    if st.session_state.get("explorer_query") == query_choice:
+        # A different result (parameters, page size or data) starts again from its first page
+        view_key = (query_choice, repr(params), paginate, page_size, db_connection.data_version())
+        if st.session_state.get("explorer_view") != view_key:
+            st.session_state["explorer_view"] = view_key
+            st.session_state["explorer_page"] = 0
+        page = st.session_state.get("explorer_page", 0) if paginate else None
+        # Other widgets rerun the script too; the query only runs (and is logged)
+        # when Run is pressed or the page, its size, the parameters or the data change
+        cached = st.session_state.get("explorer_result")
+        if cached is None or cached[0] != (view_key, page):
+            result = run_query(QUERIES[query_choice], query_choice, params, page, page_size)
+            page = result[3]
+            if paginate:
+                st.session_state["explorer_page"] = page
+            cached = ((view_key, page), result)
+            st.session_state["explorer_result"] = cached
+        df, stats, (total, exact), page = cached[1]
+        if stats is not None:
+            show_query_cost(query_choice, stats)
         if not df.empty:
             st.success("Query executed successfully ✅")
             st.dataframe(df)
+            with st.expander("Export full result"):
+                data_export.export_panel("explorer", db_connection.DB_PATH, QUERIES[query_choice], params,
+                                         query_choice)
+        if paginate and stats is not None:
+            n_pages = max(1, -(-total // page_size))
+            c1, c2, c3 = st.columns([1, 2, 1])
+            with c1:
+                st.button("◀ Previous", on_click=set_page, args=(page - 1,), disabled=page == 0)
+            with c2:
+                st.caption(f"Page {page + 1} of {n_pages}{'' if exact else '+'} · {total:,}{'' if exact else '+'} rows")
+            with c3:
+                st.button("Next ▶", on_click=set_page, args=(page + 1,), disabled=exact and page + 1 >= n_pages)
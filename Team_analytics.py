@@ -0,0 +1,70 @@
+import streamlit as st
+import db_connection
+import instrumentation
+import schema_registry
+import team_cube
+
+
+@instrumentation.traced
+@st.cache_resource(max_entries=1)
+def load_team_cube(version):
+    """Team x format x role aggregates, rebuilt only when the data version changes."""
+    with db_connection.connect() as conn:
+        players = schema_registry.load("players", conn)
+        stats = {
+            "batting_stats": schema_registry.load("batting_stats", conn),
+            "bowling_stats": schema_registry.load("bowling_stats", conn),
+        }
+    return team_cube.build_team_cube(players, stats)
+
+
+def app():
+    st.title("🌍 Team Analytics")
+    st.markdown("Totals and averages by team, format and role. Every slice is read from a precomputed cube.")
+
+    try:
+        cube = load_team_cube(db_connection.data_version())
+    except schema_registry.SchemaError as e:
+        st.error(f"Cannot load team stats: {e}")
+        return
+
+    dataset = st.radio("Statistics", ["batting_stats", "bowling_stats"], horizontal=True,
+                       format_func=lambda name: "🏏 Batting" if name == "batting_stats" else "🎯 Bowling")
+
+    c1, c2, c3 = st.columns(3)
+    team = c1.selectbox("Team", [team_cube.ALL] + team_cube.dimension_values(cube, dataset, "team_name"))
+    format_ = c2.selectbox("Format", [team_cube.ALL] + team_cube.dimension_values(cube, dataset, "format"))
+    role = c3.selectbox("Role", [team_cube.ALL] + team_cube.dimension_values(cube, dataset, "role"))
+
+    cell = team_cube.cube_slice(cube, dataset, team, format_, role)
+    if cell is None:
+        st.info("No statistics for this combination.")
+        return
+
+    headline = ["players", "runs", "innings", "avg"] if dataset == "batting_stats" else ["players", "wickets", "innings", "eco"]
+    for col, measure in zip(st.columns(len(headline)), headline):
+        value = cell[measure]
+        col.metric(measure.replace("_", " ").title(), "—" if value != value else f"{value:,.2f}".rstrip("0").rstrip("."))
+
+    with st.expander("All measures for this slice"):
+        st.dataframe(cell.rename("value").to_frame(), use_container_width=True)
+
+    # ---------------- Breakdown ----------------
+    st.markdown("### Breakdown")
+    c1, c2 = st.columns(2)
+    dimension_labels = {"team_name": "Team", "format": "Format", "role": "Role"}
+    by = c1.selectbox("Break down by", list(dimension_labels), format_func=dimension_labels.get)
+    measure = c2.selectbox("Measure", list(cell.index), index=list(cell.index).index(headline[1]))
+
+    rows = team_cube.breakdown(cube, dataset, by, team, format_, role)
+    if rows.empty:
+        st.info("Nothing to break down for this slice.")
+        return
+    rows = rows.sort_values(measure, ascending=False)
+    st.bar_chart(rows[measure])
+    st.dataframe(rows, use_container_width=True)
+
+
+# Launcher
+if __name__ == "__main__":
+    app()
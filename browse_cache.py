@@ -0,0 +1,248 @@
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+
+import pandas as pd
+
+import column_profile
+import instrumentation
+import query_pager
+
+# Side database holding one table per browsed CSV file, kept in step with the file
+CACHE_DB = "browse_cache.db"
+
+# Rows parsed and inserted per chunk when a CSV file is (re)loaded
+LOAD_CHUNK_ROWS = 50_000
+
+# Bumped when the cache layout changes; an older cache file is cleared and refilled
+CACHE_SCHEMA = 2
+
+_lock = threading.RLock()
+_conn = None
+
+# table -> (generation, last profiled rowid, column_profile state)
+_profiles = {}
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(CACHE_DB, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        if _conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA:
+            with _conn:
+                tables = _conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+                for (table,) in tables:
+                    _conn.execute(f"DROP TABLE {_quote(table)}")
+                _conn.execute(f"PRAGMA user_version = {CACHE_SCHEMA}")
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS browse_files (
+                path TEXT PRIMARY KEY,
+                table_name TEXT,
+                mtime_ns INTEGER,
+                size INTEGER,
+                sha1 TEXT,
+                generation INTEGER,
+                columns TEXT
+            )
+        """)
+    return _conn
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _table_name(path: str) -> str:
+    return "csv_" + re.sub(r"\W+", "_", os.path.splitext(os.path.basename(path))[0]).lower()
+
+
+def _sha1(path: str, size: int) -> str:
+    """Digest of the first `size` bytes of a file."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        while size > 0:
+            block = f.read(min(size, 1 << 20))
+            if not block:
+                break
+            digest.update(block)
+            size -= len(block)
+    return digest.hexdigest()
+
+
+def _appended_tail(path: str, row) -> bytes:
+    """Bytes added to the end of a file since it was loaded, or None if it was otherwise changed."""
+    _, _, size, sha1, _, _ = row
+    if os.path.getsize(path) <= size or _sha1(path, size) != sha1:
+        return None
+    with open(path, "rb") as f:
+        f.seek(size - 1)
+        tail = f.read()
+    # Only whole lines appended after a complete last line count as an append
+    return tail[1:] if tail[:1] == b"\n" else None
+
+
+def _load_chunks(conn: sqlite3.Connection, table: str, chunks) -> list:
+    columns = None
+    for chunk in chunks:
+        if columns is None:
+            columns = [(str(name), "number" if pd.api.types.is_numeric_dtype(dtype) else "text")
+                       for name, dtype in chunk.dtypes.items()]
+        chunk.to_sql(table, conn, if_exists="append", index=False)
+    return columns
+
+
+@instrumentation.traced
+def ensure_loaded(path: str) -> dict:
+    """Cached table for a CSV file, loading it first if the file is new or has changed.
+
+    Rows appended to a loaded file are added to its table; any other change
+    reloads it and starts a new generation. Returns {"table", "columns":
+    [(name, "number" | "text")], "version", "generation"}. Raises FileNotFoundError.
+    """
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        conn = _connection()
+        row = conn.execute("SELECT table_name, mtime_ns, size, sha1, generation, columns FROM browse_files "
+                           "WHERE path = ?", (path,)).fetchone()
+        if row and (row[1], row[2]) == version:
+            return {"table": row[0], "columns": [tuple(c) for c in json.loads(row[5])],
+                    "version": version, "generation": row[4]}
+
+        tail = _appended_tail(path, row) if row else None
+        with conn:
+            if tail is not None:
+                table, generation, columns = row[0], row[4], [tuple(c) for c in json.loads(row[5])]
+                if tail.strip():
+                    _load_chunks(conn, table, pd.read_csv(io.BytesIO(tail), header=None,
+                                                          names=[name for name, _ in columns],
+                                                          chunksize=LOAD_CHUNK_ROWS))
+            else:
+                table, generation = _table_name(path), (row[4] + 1 if row else 1)
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                columns = _load_chunks(conn, table, pd.read_csv(path, chunksize=LOAD_CHUNK_ROWS)) or []
+            conn.execute("INSERT OR REPLACE INTO browse_files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (path, table, *version, _sha1(path, stat.st_size), generation, json.dumps(columns)))
+        return {"table": table, "columns": columns, "version": version, "generation": generation}
+
+
+@instrumentation.traced
+def profile(loaded: dict) -> pd.DataFrame:
+    """Column profile of a loaded file (see column_profile.summarize).
+
+    Kept per file and generation: rows appended since the last call are
+    profiled on their own and merged in, rather than profiling the table again.
+    """
+    with _lock:
+        generation, last_rowid, state = _profiles.get(loaded["table"], (None, 0, {}))
+        if generation != loaded["generation"]:
+            last_rowid, state = 0, {}
+        chunks = query_pager.stream_query(
+            _connection(), f"SELECT rowid AS _rowid, * FROM {loaded['table']} WHERE rowid > ? ORDER BY rowid",
+            (last_rowid,), chunk_size=LOAD_CHUNK_ROWS,
+        )
+        for columns, rows in chunks:
+            if not rows:
+                continue
+            frame = pd.DataFrame(rows, columns=columns).infer_objects()
+            state = column_profile.merge(state, column_profile.profile_frame(frame.drop(columns="_rowid")))
+            last_rowid = int(frame["_rowid"].iloc[-1])
+        _profiles[loaded["table"]] = (loaded["generation"], last_rowid, state)
+        return column_profile.summarize(state)
+
+
+def _sort_key(column: str, kind: str) -> str:
+    # Missing values sort first, as SQLite sorts NULLs, but stay comparable for keyset paging
+    return f"IFNULL({_quote(column)}, {'-1e308' if kind == 'number' else chr(39) * 2})"
+
+
+def _where(filters: dict) -> tuple:
+    """SQL condition and params for {column: ("contains", text) | ("range", low, high)}."""
+    conditions, params = [], []
+    for column, spec in (filters or {}).items():
+        if spec[0] == "contains" and spec[1]:
+            conditions.append(f"CAST({_quote(column)} AS TEXT) LIKE ? ESCAPE '\\'")
+            params.append("%" + re.sub(r"([%_\\])", r"\\\1", spec[1]) + "%")
+        elif spec[0] == "range":
+            if spec[1] is not None:
+                conditions.append(f"{_quote(column)} >= ?")
+                params.append(spec[1])
+            if spec[2] is not None:
+                conditions.append(f"{_quote(column)} <= ?")
+                params.append(spec[2])
+    return " AND ".join(conditions) or "1", tuple(params)
+
+
+def _ensure_sort_index(conn: sqlite3.Connection, table: str, key_sql: str, position: int):
+    # Built the first time a column is sorted on (rowid is implicit in the index), so later pages are index seeks
+    conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{position} ON {table} ({key_sql})")
+
+
+@instrumentation.traced
+def fetch_page(loaded: dict, filters: dict = None, sort: str = None, descending: bool = False,
+               page_size: int = 50, after: tuple = None) -> tuple:
+    """One page of rows, filtered and sorted in SQL; returns (df, cursor of the next page or None).
+
+    Pages are read by keyset on (sort key, rowid): `after` is the cursor returned
+    for the previous page, so every page costs the same however deep it is.
+    """
+    table = loaded["table"]
+    kinds = dict(loaded["columns"])
+    where, params = _where(filters)
+    if sort:
+        key_sql = _sort_key(sort, kinds[sort])
+    else:
+        key_sql = "rowid"
+    direction, op = ("DESC", "<") if descending else ("ASC", ">")
+    if after is not None:
+        where += f" AND ({key_sql}, rowid) {op} (?, ?)"
+        params += tuple(after)
+
+    with _lock:
+        conn = _connection()
+        if sort:
+            with conn:
+                _ensure_sort_index(conn, table, key_sql, list(kinds).index(sort))
+        df = query_pager.read_query(
+            conn,
+            f"SELECT {key_sql} AS _sort_key, rowid AS _rowid, * FROM {table} WHERE {where} "
+            f"ORDER BY {key_sql} {direction}, rowid {direction} LIMIT ?",
+            params + (page_size + 1,),
+        )
+    cursor = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        key = df["_sort_key"].iloc[-1]
+        # numpy scalars do not bind as SQLite parameters
+        cursor = (key.item() if hasattr(key, "item") else key, int(df["_rowid"].iloc[-1]))
+    return df.drop(columns=["_sort_key", "_rowid"]), cursor
+
+
+def view_query(loaded: dict, filters: dict = None, sort: str = None, descending: bool = False) -> tuple:
+    """(sql, params) for every row of the filtered, sorted view, e.g. for an export."""
+    where, params = _where(filters)
+    direction = "DESC" if descending else "ASC"
+    order = f"rowid {direction}"
+    if sort:
+        order = f"{_sort_key(sort, dict(loaded['columns'])[sort])} {direction}, {order}"
+    return f"SELECT * FROM {loaded['table']} WHERE {where} ORDER BY {order}", params
+
+
+@instrumentation.traced
+def count_rows(loaded: dict, filters: dict = None) -> tuple:
+    """Matching row count (capped, see query_pager.COUNT_CAP); returns (count, is_exact)."""
+    where, params = _where(filters)
+    return _count(loaded["table"], loaded["version"], where, params)
+
+
+@lru_cache(maxsize=256)
+def _count(table: str, version: tuple, where: str, params: tuple) -> tuple:
+    # Keyed on the file version, so paging through the same filter counts only once
+    with _lock:
+        return query_pager.estimate_row_count(_connection(), f"SELECT 1 FROM {table} WHERE {where}", params)
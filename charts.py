@@ -0,0 +1,63 @@
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import instrumentation
+
+# Rendered charts kept per process; keys carry the data version, so charts for
+# older data simply age out of the LRU and memory stays bounded
+MAX_CHARTS = 64
+
+# Figures built with the Figure API are not registered with pyplot, so each one
+# is freed as soon as its PNG is written and rendering is safe off the script thread
+_render_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chart-render")
+_lock = threading.Lock()
+_charts = OrderedDict()
+
+
+@instrumentation.traced
+def bar_chart_png(labels, values, title: str, xlabel: str, ylabel: str, color: str) -> bytes:
+    """Horizontal bar chart, first label on top, as PNG bytes."""
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ax.barh(list(labels), list(values), color=color)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.invert_yaxis()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    fig.clear()
+    return buffer.getvalue()
+
+
+def cached_chart(key: tuple, render):
+    """Future for the PNG stored under `key`; `render()` runs in the worker pool only on a miss.
+
+    Callers can request several charts before waiting on any, so they render in
+    parallel. A failed render is dropped so the next request retries it.
+    """
+    with _lock:
+        future = _charts.get(key)
+        if future is not None:
+            _charts.move_to_end(key)
+            return future
+        future = _render_executor.submit(render)
+        _charts[key] = future
+        while len(_charts) > MAX_CHARTS:
+            _charts.popitem(last=False)
+    future.add_done_callback(lambda done: _discard_failed(key, done))
+    return future
+
+
+def _discard_failed(key: tuple, future):
+    if future.exception() is None:
+        return
+    with _lock:
+        if _charts.get(key) is future:
+            del _charts[key]
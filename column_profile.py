@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+# Quantiles reported for numeric columns
+QUANTILES = {"p25": 0.25, "median": 0.5, "p75": 0.75}
+
+# Most frequent values listed per column
+TOP_VALUES = 5
+
+
+def profile_frame(df: pd.DataFrame) -> dict:
+    """Mergeable profile state of a frame: per column, its dtype, row and null counts and value counts.
+
+    Value counts carry everything else (distinct, min/max, exact quantiles and
+    top values), and two states merge by adding them, so appended rows only
+    need profiling on their own.
+    """
+    return {
+        column: {
+            # An all-null column says nothing about its type; other rows decide it on merge
+            "dtype": str(df[column].dtype) if df[column].notna().any() else None,
+            "rows": len(df),
+            "nulls": int(df[column].isna().sum()),
+            "counts": df[column].value_counts(dropna=True),
+        }
+        for column in df.columns
+    }
+
+
+def _merge_dtype(a: str, b: str) -> str:
+    if a is None or b is None or a == b:
+        return a or b
+    if {a, b} <= {"int64", "float64"}:
+        return "float64"
+    return "object"
+
+
+def merge(state: dict, other: dict) -> dict:
+    """Profile state of two frames' rows together."""
+    merged = {}
+    for column, part in other.items():
+        if column not in state:
+            merged[column] = part
+            continue
+        base = state[column]
+        merged[column] = {
+            "dtype": _merge_dtype(base["dtype"], part["dtype"]),
+            "rows": base["rows"] + part["rows"],
+            "nulls": base["nulls"] + part["nulls"],
+            "counts": base["counts"].add(part["counts"], fill_value=0).astype(int),
+        }
+    return merged
+
+
+def _quantile(values: np.ndarray, cumulative: np.ndarray, q: float):
+    # Lower quantile from a sorted value histogram, without expanding it back to rows
+    return values[np.searchsorted(cumulative, q * cumulative[-1], side="left")]
+
+
+def summarize(state: dict) -> pd.DataFrame:
+    """One row per column: dtype, nulls, distinct count, min/max, quantiles and top values."""
+    rows = []
+    for column, part in state.items():
+        counts = part["counts"]
+        row = {
+            "column": column,
+            "dtype": part["dtype"],
+            "rows": part["rows"],
+            "nulls": part["nulls"],
+            "null %": round(100 * part["nulls"] / part["rows"], 1) if part["rows"] else None,
+            "distinct": len(counts),
+        }
+        if len(counts):
+            try:
+                ordered = counts.sort_index()
+            except TypeError:
+                # Numbers and text mixed in one column: order them as text
+                ordered = counts.sort_index(key=lambda index: index.astype(str))
+            row["min"], row["max"] = str(ordered.index[0]), str(ordered.index[-1])
+            if pd.api.types.is_numeric_dtype(ordered.index):
+                values, cumulative = ordered.index.to_numpy(), ordered.to_numpy().cumsum()
+                for label, q in QUANTILES.items():
+                    row[label] = str(_quantile(values, cumulative, q))
+            # Ties by count are listed in value order, however the counts were merged
+            top = ordered.sort_values(ascending=False, kind="stable").head(TOP_VALUES)
+            row["top values"] = ", ".join(f"{value} ({count})" for value, count in top.items())
+        rows.append(row)
+    # Value columns mix numbers and text across rows, so they are shown as text
+    return pd.DataFrame(rows, columns=["column", "dtype", "rows", "nulls", "null %", "distinct",
+                                       "min", *QUANTILES, "max", "top values"]).fillna({
+        c: "" for c in ["dtype", "min", *QUANTILES, "max", "top values"]})
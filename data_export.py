@@ -0,0 +1,151 @@
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import sqlite3
+from urllib.request import pathname2url
+
+import streamlit as st
+
+import instrumentation
+import query_pager
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Parquet and Arrow IPC exports are offered only when pyarrow is installed
+    pa = None
+
+# Rows pulled from the cursor and written per chunk
+EXPORT_CHUNK_ROWS = 10_000
+
+FORMATS = {
+    "parquet": {"label": "Parquet", "extension": "parquet", "mime": "application/vnd.apache.parquet", "arrow": True},
+    "arrow": {"label": "Arrow IPC", "extension": "arrow", "mime": "application/vnd.apache.arrow.file", "arrow": True},
+    "csv.gz": {"label": "CSV (gzip)", "extension": "csv.gz", "mime": "application/gzip", "arrow": False},
+    "jsonl": {"label": "JSON lines", "extension": "jsonl", "mime": "application/x-ndjson", "arrow": False},
+}
+
+
+def available_formats() -> list:
+    return [name for name, spec in FORMATS.items() if pa is not None or not spec["arrow"]]
+
+
+def _write_csv_gz(chunks, f):
+    with gzip.GzipFile(fileobj=f, mode="wb") as gz, io.TextIOWrapper(gz, encoding="utf-8", newline="") as text:
+        writer = csv.writer(text)
+        for i, (columns, rows) in enumerate(chunks):
+            if i == 0:
+                writer.writerow(columns)
+            writer.writerows(rows)
+
+
+def _write_jsonl(chunks, f):
+    for columns, rows in chunks:
+        f.write("".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows).encode("utf-8"))
+
+
+def _arrow_type(values: list):
+    """Arrow type for a column from its first chunk; untyped or mixed columns become strings."""
+    kinds = {type(v) for v in values if v is not None}
+    if kinds and kinds <= {int}:
+        return pa.int64()
+    if kinds and kinds <= {int, float}:
+        return pa.float64()
+    if kinds == {bytes}:
+        return pa.binary()
+    return pa.string()
+
+
+def _record_batches(chunks):
+    """Yield (schema, batch) per chunk; the first chunk fixes the schema (SQLite columns are untyped)."""
+    schema = None
+    for columns, rows in chunks:
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        if schema is None:
+            schema = pa.schema([(name, _arrow_type(list(col))) for name, col in zip(columns, values)])
+        arrays = []
+        for field, col in zip(schema, values):
+            if field.type == pa.string():
+                col = [None if v is None else str(v) for v in col]
+            try:
+                arrays.append(pa.array(col, type=field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                raise ValueError(f"Column {field.name!r} changes type part-way through the result; "
+                                 "export it as CSV or JSON lines instead") from e
+        yield schema, pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _write_parquet(chunks, f):
+    writer = None
+    for schema, batch in _record_batches(chunks):
+        if writer is None:
+            writer = pa.parquet.ParquetWriter(f, schema, compression="zstd")
+        writer.write_batch(batch)
+    if writer is not None:
+        writer.close()
+
+
+def _write_arrow(chunks, f):
+    writer = None
+    for schema, batch in _record_batches(chunks):
+        if writer is None:
+            writer = pa.ipc.new_file(f, schema)
+        writer.write_batch(batch)
+    if writer is not None:
+        writer.close()
+
+
+WRITERS = {"parquet": _write_parquet, "arrow": _write_arrow, "csv.gz": _write_csv_gz, "jsonl": _write_jsonl}
+
+
+def export_query(db_path: str, query: str, params, fmt: str, f):
+    """Stream a query's result into a binary file object, one chunk at a time.
+
+    The query runs on its own read-only connection, so a long export neither
+    holds the app's shared connection nor blocks writers (the database uses WAL).
+    """
+    if fmt not in available_formats():
+        raise ValueError(f"Export format {fmt!r} is not available (Parquet and Arrow IPC need pyarrow)")
+    conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro", uri=True)
+    try:
+        WRITERS[fmt](query_pager.stream_query(conn, query, params, chunk_size=EXPORT_CHUNK_ROWS), f)
+    finally:
+        conn.close()
+
+
+@instrumentation.traced
+def export_to_bytes(db_path: str, query: str, params, fmt: str) -> bytes:
+    """The finished export file's contents; only the (compressed or columnar) output is held in memory."""
+    buffer = io.BytesIO()
+    export_query(db_path, query, params, fmt, buffer)
+    return buffer.getvalue()
+
+
+def export_panel(key: str, db_path: str, query: str, params, file_stem: str):
+    """Format picker, Export button and a download for the finished file.
+
+    The result is streamed into the file chunk by chunk. The finished file is
+    kept in the session (the download button needs its bytes on every rerun)
+    until the next export replaces it or the session ends; nothing is left on disk.
+    """
+    file_stem = re.sub(r"[^\w.-]+", "_", file_stem).strip("_")
+    c1, c2 = st.columns([2, 1])
+    fmt = c1.selectbox("Export format", available_formats(), format_func=lambda name: FORMATS[name]["label"],
+                       key=f"{key}_format")
+    request = (db_path, query, repr(params), fmt)
+    done = st.session_state.get(f"{key}_export")
+    if c2.button("Export", key=f"{key}_run"):
+        try:
+            done = {"request": request, "data": export_to_bytes(db_path, query, params, fmt)}
+        except Exception as e:
+            st.error(f"Export failed: {e}")
+            done = None
+        st.session_state[f"{key}_export"] = done
+    if done and done["request"] == request:
+        st.download_button(f"Download {file_stem}.{FORMATS[fmt]['extension']} ({len(done['data']) / 1024:,.1f} KB)",
+                           done["data"], file_name=f"{file_stem}.{FORMATS[fmt]['extension']}",
+                           mime=FORMATS[fmt]["mime"], key=f"{key}_download")
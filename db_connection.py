@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import streamlit as st
+
+import ingest
+
+DB_PATH = "CricBuzz_database.db"
+
+# Prepared statements kept per connection by the sqlite3 module
+STATEMENT_CACHE_SIZE = 256
+
+# Seconds a writer waits for another process's write lock
+BUSY_TIMEOUT = 10
+
+# Idle read connections kept for reuse; Streamlit runs most reruns on a fresh thread,
+# so connections are pooled rather than tied to a thread, and keep their statement caches
+READER_POOL_SIZE = 8
+
+_lock = threading.RLock()
+_idle_readers = []
+_readers_lock = threading.Lock()
+
+
+@st.cache_resource
+def get_connection() -> sqlite3.Connection:
+    """Process-wide write connection shared by every session; see write_connection()."""
+    # IMMEDIATE takes the write lock when a write transaction starts, so two
+    # writers queue on busy_timeout instead of failing when they try to upgrade
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE,
+                           timeout=BUSY_TIMEOUT, isolation_level="IMMEDIATE")
+    # WAL lets readers keep reading the last commit while a writer's transaction is open
+    conn.execute("PRAGMA journal_mode=WAL")
+    ingest.ensure_schema(conn)
+    return conn
+
+
+def _open_reader() -> sqlite3.Connection:
+    # The schema is brought up to date on the write connection before anyone reads
+    get_connection()
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE,
+                           timeout=BUSY_TIMEOUT)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+@contextmanager
+def connect():
+    """A read-only connection, used by this thread alone until the block ends.
+
+    Readers never take the write lock: under WAL each one sees the last
+    committed data while a writer's transaction (and any rebuild inside it)
+    is still running, in this process or another.
+    """
+    with _readers_lock:
+        conn = _idle_readers.pop() if _idle_readers else None
+    if conn is None:
+        conn = _open_reader()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        with _readers_lock:
+            if len(_idle_readers) < READER_POOL_SIZE:
+                _idle_readers.append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+
+
+@contextmanager
+def write_connection():
+    """The shared write connection, held by one of Streamlit's script threads at a time."""
+    with _lock:
+        yield get_connection()
+
+
+def data_version() -> int:
+    """Counter that changes whenever the database is written.
+
+    Database writes bump the app_meta counter in the same transaction, which also
+    catches writes made by other processes sharing the database file.
+    """
+    with connect() as conn:
+        (version,) = conn.execute("SELECT value FROM app_meta WHERE key = 'data_version'").fetchone()
+    return version
@@ -0,0 +1,100 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import schema_registry
+
+# Canonical table -> table holding its derived metrics, one row per
+# (player, format, source) plus an "All" row per (player, source)
+DERIVED_TABLES = {
+    "batting_stats": "batting_metrics",
+    "bowling_stats": "bowling_metrics",
+}
+
+ALL_FORMATS = "All"
+
+
+def _ratio(numerator, denominator, scale=1.0):
+    """numerator / denominator * scale, NaN wherever the denominator is 0 or missing."""
+    return numerator / denominator.where(denominator != 0) * scale
+
+
+# Declared catalog: metric name -> formula over a frame of float base stats.
+# The points formulas are the weights the SQL explorer's performance ranking uses.
+CATALOG = {
+    "batting_stats": {
+        "dismissals": lambda s: s["innings"] - s["not_out"],
+        "runs_per_innings": lambda s: _ratio(s["runs"], s["innings"]),
+        "balls_per_dismissal": lambda s: _ratio(s["balls_faced"], s["innings"] - s["not_out"]),
+        "boundary_run_pct": lambda s: _ratio(4 * s["fours"] + 6 * s["sixes"], s["runs"], 100),
+        "boundaries_per_innings": lambda s: _ratio(s["fours"] + s["sixes"], s["innings"]),
+        "batting_points": lambda s: s["runs"] * 0.01 + s["avg"] * 0.5 + s["strike_rate"] * 0.3,
+    },
+    "bowling_stats": {
+        "wickets_per_innings": lambda s: _ratio(s["wickets"], s["innings"]),
+        "balls_per_innings": lambda s: _ratio(s["balls"], s["innings"]),
+        # Dot-ball proxy: share of deliveries bowled in maiden overs (a lower bound on dots)
+        "maiden_ball_pct": lambda s: _ratio(6 * s["maidens"], s["balls"], 100),
+        "haul_rate_pct": lambda s: _ratio(s["4w"] + s["5w"], s["innings"], 100),
+        "bowling_points": lambda s: s["wickets"] * 2 + (50 - s["avg"]) * 0.5 + (6 - s["eco"]) * 2,
+    },
+}
+
+
+def compute(dataset: str, stats: pd.DataFrame) -> pd.DataFrame:
+    """Derived metrics for every row of a canonical stats frame, plus the "All" rollup.
+
+    The rollup sums counting stats across formats and averages rate stats (the
+    float columns), as the SQL explorer's queries do, then applies the same formulas.
+    """
+    cols = schema_registry.columns(dataset)
+    dtypes = {name: dtype for name, _, dtype in schema_registry.SCHEMAS[dataset]["columns"]}
+    keys = [cols.id, "source"]
+    base = stats[cols.metrics].astype(float)
+    base[keys + [cols.name, cols.format]] = stats[keys + [cols.name, cols.format]]
+
+    aggregations = {metric: "mean" if dtypes[metric] == "float64" else "sum" for metric in cols.metrics}
+    aggregations[cols.name] = "first"
+    rollup = base.groupby(keys, as_index=False, sort=False).agg(aggregations)
+    # A stat no format recorded stays missing instead of summing to 0
+    counted = base.groupby(keys, sort=False)[cols.metrics].count().to_numpy() > 0
+    rollup[cols.metrics] = rollup[cols.metrics].where(counted)
+    rollup[cols.format] = ALL_FORMATS
+
+    frame = pd.concat([base, rollup], ignore_index=True)
+    derived = pd.DataFrame({name: formula(frame) for name, formula in CATALOG[dataset].items()})
+    derived = derived.replace([np.inf, -np.inf], np.nan).round(4)
+    return pd.concat([frame[[cols.id, cols.name, cols.format, "source"]], derived], axis=1)
+
+
+def _create_sql(dataset: str) -> str:
+    metrics = ", ".join(f"{name} REAL" for name in CATALOG[dataset])
+    return (f"CREATE TABLE {DERIVED_TABLES[dataset]} (player_id INTEGER NOT NULL, player_name TEXT, "
+            f"format TEXT NOT NULL, source TEXT NOT NULL, {metrics}, PRIMARY KEY (player_id, format, source))")
+
+
+def _insert(conn: sqlite3.Connection, dataset: str, derived: pd.DataFrame):
+    rows = derived.astype(object).where(derived.notna(), None)
+    conn.executemany(
+        f"INSERT INTO {DERIVED_TABLES[dataset]} VALUES ({', '.join('?' * len(rows.columns))})",
+        rows.itertuples(index=False, name=None),
+    )
+
+
+def build_derived_tables(conn: sqlite3.Connection):
+    """(Re)build every derived-metrics table from the canonical tables; run inside the caller's transaction."""
+    for dataset, table in DERIVED_TABLES.items():
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(_create_sql(dataset))
+        _insert(conn, dataset, compute(dataset, schema_registry.load(dataset, conn)))
+        conn.execute(f"CREATE INDEX idx_{table}_format ON {table} (format)")
+
+
+def refresh_players(conn: sqlite3.Connection, player_ids):
+    """Recompute the given players' derived rows after their canonical rows changed."""
+    player_ids = list(player_ids)
+    for dataset, table in DERIVED_TABLES.items():
+        conn.executemany(f"DELETE FROM {table} WHERE player_id = ?", [(pid,) for pid in player_ids])
+        stats = schema_registry.load(dataset, conn, where={"player_id": player_ids})
+        _insert(conn, dataset, compute(dataset, stats))
@@ -0,0 +1,285 @@
+import sqlite3
+import sys
+import warnings
+
+import derived_metrics
+import percentiles
+
+# Canonical tables: one row per (player, format, source) with the same column
+# names and types whichever raw table the row came from.
+CANONICAL_SCHEMA = {
+    "batting_stats": """
+        CREATE TABLE batting_stats (
+            player_id INTEGER NOT NULL,
+            player_name TEXT,
+            format TEXT NOT NULL,
+            source TEXT NOT NULL,
+            matches INTEGER,
+            innings INTEGER,
+            not_out INTEGER,
+            runs INTEGER,
+            balls_faced INTEGER,
+            highest_score INTEGER,
+            avg REAL,
+            strike_rate REAL,
+            fours INTEGER,
+            sixes INTEGER,
+            fifty_plus INTEGER,
+            hundreds INTEGER,
+            double_hundreds INTEGER,
+            ducks INTEGER,
+            PRIMARY KEY (player_id, format, source)
+        )
+    """,
+    "bowling_stats": """
+        CREATE TABLE bowling_stats (
+            player_id INTEGER NOT NULL,
+            player_name TEXT,
+            format TEXT NOT NULL,
+            source TEXT NOT NULL,
+            matches INTEGER,
+            innings INTEGER,
+            balls INTEGER,
+            runs INTEGER,
+            maidens INTEGER,
+            wickets INTEGER,
+            avg REAL,
+            eco REAL,
+            sr REAL,
+            bbi TEXT,
+            bbm TEXT,
+            "4w" INTEGER,
+            "5w" INTEGER,
+            "10w" INTEGER,
+            bbi_wickets INTEGER,
+            bbi_runs INTEGER,
+            bbi_key INTEGER,
+            bbm_wickets INTEGER,
+            bbm_runs INTEGER,
+            bbm_key INTEGER,
+            PRIMARY KEY (player_id, format, source)
+        )
+    """,
+}
+
+# Bumped whenever CANONICAL_SCHEMA (or a table derived from it) changes, so
+# existing databases get rebuilt
+CANONICAL_VERSION = 4
+
+# Best figures ("6/15", or "-/-" when there are none) are split into wickets and
+# runs; the key orders them best first: more wickets, then fewer runs conceded
+FIGURES_SCALE = 1000
+
+
+def _figures_sql(column: str) -> str:
+    valid = f"{column} GLOB '[0-9]*/[0-9]*'"
+    wickets = f"CASE WHEN {valid} THEN CAST(substr({column}, 1, instr({column}, '/') - 1) AS INTEGER) END"
+    runs = f"CASE WHEN {valid} THEN CAST(substr({column}, instr({column}, '/') + 1) AS INTEGER) END"
+    return f"{wickets}, {runs}, {wickets} * {FIGURES_SCALE} - {runs}"
+
+
+def figures_from_key(key) -> tuple:
+    """(wickets, runs) back from a bbi_key/bbm_key value."""
+    wickets = -(-int(key) // FIGURES_SCALE)
+    return wickets, wickets * FIGURES_SCALE - int(key)
+
+
+# Raw table -> SELECT list in canonical column order
+CANONICAL_SOURCES = {
+    "batting_stats": {
+        "batsman": ("all_batsmen_stats", """
+            player_id, player_name, format, 'batsman', matches, innings, not_out, runs, balls_faced,
+            highest_score, CAST(average AS REAL), CAST(strike_rate AS REAL), fours, sixes,
+            fifty_plus, hundreds, double_hundreds, NULL
+        """),
+        "all_rounder": ("all_rounders_batting_stats", """
+            player_id, player_name, format, 'all_rounder', matches, innings, not_out, runs, NULL,
+            high_score, CAST(avg AS REAL), CAST(strike_rate AS REAL), fours, sixes,
+            fifties, hundreds, NULL, ducks
+        """),
+    },
+    "bowling_stats": {
+        "bowler": ("all_bowlers_stats", """
+            player_id, player_name, format, 'bowler', matches, innings, balls, runs, maidens, wickets,
+            CAST(avg AS REAL), CAST(eco AS REAL), CAST(sr AS REAL), bbi, bbm, "4w", "5w", "10w",
+            """ + _figures_sql("bbi") + ", " + _figures_sql("bbm")),
+        "all_rounder": ("all_rounders_bowling_stats", """
+            player_id, player_name, format, 'all_rounder', matches, innings, balls, runs, maidens, wickets,
+            CAST(avg AS REAL), CAST(eco AS REAL), CAST(sr AS REAL), bbi, bbm, "4w", "5w", "10w",
+            """ + _figures_sql("bbi") + ", " + _figures_sql("bbm")),
+    },
+}
+
+
+# Keys the CRUD page writes by; raw tables were imported without constraints
+ROW_KEYS = {
+    "cricket_player_data": ("id", "team_name"),
+    "all_batsmen_stats": ("player_id", "format"),
+}
+
+
+def build_canonical_tables(conn: sqlite3.Connection):
+    """(Re)build the canonical batting and bowling tables, their derived metrics and percentile ranks."""
+    with conn:
+        for table, create_sql in CANONICAL_SCHEMA.items():
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(create_sql)
+            for raw_table, select_list in CANONICAL_SOURCES[table].values():
+                # Raw tables contain a few exact duplicate rows; the primary key drops them
+                conn.execute(f"INSERT OR IGNORE INTO {table} SELECT {select_list} FROM {raw_table}")
+            conn.execute(f"CREATE INDEX idx_{table}_format ON {table} (format)")
+        for figures in ("bbi", "bbm"):
+            conn.execute(f"CREATE INDEX idx_bowling_stats_{figures} ON bowling_stats (format, {figures}_key)")
+        derived_metrics.build_derived_tables(conn)
+        percentiles.build_percentile_tables(conn)
+        conn.execute("INSERT OR REPLACE INTO app_meta VALUES ('canonical_version', ?)", (CANONICAL_VERSION,))
+        bump_data_version(conn)
+
+
+def refresh_canonical_players(conn: sqlite3.Connection, player_ids):
+    """Re-derive the given players' canonical rows after a write to the raw tables.
+
+    Percentile ranks are recomputed only for the formats whose canonical rows
+    actually changed, e.g. a CRUD edit re-ranks one batting format and leaves
+    the bowling ranks alone.
+    """
+    keys = [(player_id,) for player_id in player_ids]
+    changed = {}
+    for table, sources in CANONICAL_SOURCES.items():
+        before = _player_rows(conn, table, keys)
+        recorded_before = percentiles.recorded_in_table(table, conn)
+        conn.executemany(f"DELETE FROM {table} WHERE player_id = ?", keys)
+        for raw_table, select_list in sources.values():
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {table} SELECT {select_list} FROM {raw_table} WHERE player_id = ?",
+                keys,
+            )
+        # Rows are (player_id, player_name, format, ...), so the format is the third column
+        changed[table] = ({row[2] for row in before ^ _player_rows(conn, table, keys)}, recorded_before)
+    derived_metrics.refresh_players(conn, player_ids)
+    for table, (formats, recorded_before) in changed.items():
+        percentiles.refresh_formats(conn, table, formats, recorded_before)
+
+
+def _player_rows(conn: sqlite3.Connection, table: str, keys: list) -> set:
+    rows = set()
+    for key in keys:
+        rows.update(conn.execute(f"SELECT * FROM {table} WHERE player_id = ?", key).fetchall())
+    return rows
+
+
+def _day_sql(column: str) -> str:
+    # Whole days since 1970-01-01, the same numbering as series_calendar.to_day
+    return f"CAST(strftime('%s', {column}) AS INTEGER) / 86400"
+
+
+def build_series_calendar(conn: sqlite3.Connection):
+    """(Re)build the typed series calendar and its interval index from all_cricket_series.
+
+    series_intervals is an R*Tree, so overlap and point-in-time lookups are
+    logarithmic; SQLite builds without the R*Tree module get an indexed table
+    with the same columns, so queries work unchanged.
+    """
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS series_intervals")
+        conn.execute("DROP TABLE IF EXISTS series_calendar")
+        conn.execute("""
+            CREATE TABLE series_calendar (
+                id INTEGER PRIMARY KEY,
+                name TEXT,
+                series_type TEXT,
+                start_date TEXT,
+                end_date TEXT,
+                start_day INTEGER,
+                end_day INTEGER
+            )
+        """)
+        conn.execute(f"""
+            INSERT OR IGNORE INTO series_calendar
+            SELECT id, name, series_type, start_date, end_date, {_day_sql("start_date")}, {_day_sql("end_date")}
+            FROM all_cricket_series
+        """)
+        conn.execute("CREATE INDEX idx_series_calendar_start ON series_calendar (start_day)")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE series_intervals USING rtree_i32(id, start_day, end_day)")
+        except sqlite3.OperationalError:
+            conn.execute("CREATE TABLE series_intervals (id INTEGER PRIMARY KEY, start_day INTEGER, end_day INTEGER)")
+            conn.execute("CREATE INDEX idx_series_intervals ON series_intervals (start_day, end_day)")
+        conn.execute("""
+            INSERT INTO series_intervals
+            SELECT id, start_day, end_day FROM series_calendar
+            WHERE start_day IS NOT NULL AND end_day >= start_day
+        """)
+        bump_data_version(conn)
+
+
+def bump_data_version(conn: sqlite3.Connection) -> int:
+    """Mark the data as changed; caches keyed on data_version() rebuild on next read.
+
+    Returns the new version, read inside the caller's write transaction.
+    """
+    conn.execute("UPDATE app_meta SET value = value + 1 WHERE key = 'data_version'")
+    return conn.execute("SELECT value FROM app_meta WHERE key = 'data_version'").fetchone()[0]
+
+
+def ensure_row_keys(conn: sqlite3.Connection):
+    """Drop exact duplicate rows and put a unique index on each writable table's key."""
+    for table, key in ROW_KEYS.items():
+        index = f"ux_{table}_key"
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index,)).fetchone():
+            continue
+        columns = [f'"{row[1]}"' for row in conn.execute(f"PRAGMA table_info({table})")]
+        try:
+            with conn:
+                conn.execute(
+                    f"DELETE FROM {table} WHERE rowid NOT IN "
+                    f"(SELECT MIN(rowid) FROM {table} GROUP BY {', '.join(columns)})"
+                )
+                conn.execute(f"CREATE UNIQUE INDEX {index} ON {table} ({', '.join(key)})")
+        except sqlite3.IntegrityError:
+            # Rows that differ but share a key need merging by hand; the app keeps
+            # working without the index, retried on the next start
+            collisions = conn.execute(
+                f"SELECT {', '.join(key)}, COUNT(*) FROM {table} GROUP BY {', '.join(key)} "
+                "HAVING COUNT(*) > 1 LIMIT 10"
+            ).fetchall()
+            warnings.warn(f"{table}: no unique key on ({', '.join(key)}); these keys are on several "
+                          f"different rows (key..., count): {collisions}")
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    """Create everything the app needs on top of the raw tables, if missing."""
+    with conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS app_meta (key TEXT PRIMARY KEY, value INTEGER)")
+        conn.execute("INSERT OR IGNORE INTO app_meta VALUES ('data_version', 0)")
+    ensure_row_keys(conn)
+    ensure_canonical_tables(conn)
+    ensure_series_calendar(conn)
+
+
+def ensure_canonical_tables(conn: sqlite3.Connection):
+    """Build the canonical tables only if they are missing or from an older schema."""
+    existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    version = conn.execute("SELECT value FROM app_meta WHERE key = 'canonical_version'").fetchone()
+    if not set(CANONICAL_SCHEMA) <= existing or version != (CANONICAL_VERSION,):
+        build_canonical_tables(conn)
+
+
+def ensure_series_calendar(conn: sqlite3.Connection):
+    """Build the series calendar only if it is not in the database yet."""
+    existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "all_cricket_series" in existing and not {"series_calendar", "series_intervals"} <= existing:
+        build_series_calendar(conn)
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "CricBuzz_database.db"
+    conn = sqlite3.connect(db_path)
+    ensure_schema(conn)
+    build_canonical_tables(conn)
+    build_series_calendar(conn)
+    for table in [*CANONICAL_SCHEMA, *derived_metrics.DERIVED_TABLES.values(),
+                  *percentiles.PERCENTILE_TABLES.values(), "series_calendar"]:
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        print(f"{table}: {count} rows")
+    conn.close()
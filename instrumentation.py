@@ -0,0 +1,172 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Finished script runs kept for the debug sidebar and the JSON lines export
+MAX_TRACES = 20
+
+# Histogram buckets (seconds) for span durations in the Prometheus export
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+METRIC_PREFIX = "cricbuzz"
+
+# Optional sinks, off unless set to a path: every finished span appended as a
+# JSON line, and a Prometheus textfile (node_exporter textfile collector) rewritten after each run
+SPANS_JSONL_PATH = None
+PROMETHEUS_TEXTFILE_PATH = None
+
+_local = threading.local()
+_lock = threading.Lock()
+_sink_lock = threading.Lock()
+_traces = deque(maxlen=MAX_TRACES)
+# span name -> {"count", "seconds", "memory_bytes", "buckets": per-bucket counts}
+_metrics = {}
+_page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int:
+    """Resident memory of the process; the peak RSS where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _page_size
+    except OSError:
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _record(span: dict):
+    with _lock:
+        metric = _metrics.setdefault(span["name"], {"count": 0, "seconds": 0.0, "memory_bytes": 0,
+                                                    "buckets": [0] * len(BUCKETS)})
+        metric["count"] += 1
+        metric["seconds"] += span["seconds"]
+        metric["memory_bytes"] += span["memory_bytes"]
+        for i, bound in enumerate(BUCKETS):
+            if span["seconds"] <= bound:
+                metric["buckets"][i] += 1
+                break
+
+
+@contextmanager
+def span(name: str):
+    """Time a stage and its change in resident memory.
+
+    Inside a trace, the span is listed under the run (nested spans get a
+    depth); every span also feeds the per-name totals. Memory is the whole
+    process's RSS, so concurrent sessions show up in each other's deltas.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    record = {"name": name, "depth": len(stack)}
+    run = getattr(_local, "trace", None)
+    if run is not None:
+        run["spans"].append(record)
+    stack.append(record)
+    rss = rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        record["memory_bytes"] = rss_bytes() - rss
+        stack.pop()
+        _record(record)
+
+
+def traced(func):
+    """Decorator: run the function inside a span named module.function."""
+    name = f"{func.__module__}.{func.__name__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def trace(name: str):
+    """Collect every span of one script run under a root span; yields the run's record."""
+    run = {"name": name, "started_at": datetime.now().isoformat(timespec="milliseconds"), "spans": []}
+    _local.trace, _local.stack = run, []
+    try:
+        with span(name):
+            yield run
+    finally:
+        _local.trace = None
+        with _lock:
+            _traces.append(run)
+        _write_sinks(run)
+
+
+def recent_traces() -> list:
+    with _lock:
+        return list(_traces)
+
+
+def _span_lines(runs: list):
+    for run in runs:
+        for record in run["spans"]:
+            yield json.dumps({"trace": run["name"], "started_at": run["started_at"], **record}) + "\n"
+
+
+def spans_jsonl(runs: list = None) -> str:
+    """Spans of the given (default: recent) runs, one JSON object per line."""
+    return "".join(_span_lines(recent_traces() if runs is None else runs))
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text() -> str:
+    """Per-span totals since the process started, in the Prometheus text exposition format."""
+    with _lock:
+        metrics = {name: dict(m, buckets=list(m["buckets"])) for name, m in sorted(_metrics.items())}
+    seconds = f"{METRIC_PREFIX}_span_seconds"
+    memory = f"{METRIC_PREFIX}_span_memory_delta_bytes"
+    lines = [f"# HELP {seconds} Wall-clock time of instrumented stages.", f"# TYPE {seconds} histogram"]
+    for name, m in metrics.items():
+        label = f'span="{_label(name)}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS, m["buckets"]):
+            cumulative += count
+            lines.append(f'{seconds}_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'{seconds}_bucket{{{label},le="+Inf"}} {m["count"]}')
+        lines.append(f"{seconds}_sum{{{label}}} {m['seconds']:.6f}")
+        lines.append(f"{seconds}_count{{{label}}} {m['count']}")
+    lines += [f"# HELP {memory} Summed change in resident memory across instrumented stages.",
+              f"# TYPE {memory} gauge"]
+    lines += [f'{memory}{{span="{_label(name)}"}} {m["memory_bytes"]}' for name, m in metrics.items()]
+    return "\n".join(lines) + "\n"
+
+
+def _write_sinks(run: dict):
+    with _sink_lock:
+        if SPANS_JSONL_PATH:
+            with open(SPANS_JSONL_PATH, "a", encoding="utf-8") as f:
+                f.writelines(_span_lines([run]))
+        if PROMETHEUS_TEXTFILE_PATH:
+            # Written aside and renamed, so a scrape never reads a half-written file
+            partial = PROMETHEUS_TEXTFILE_PATH + ".tmp"
+            with open(partial, "w", encoding="utf-8") as f:
+                f.write(prometheus_text())
+            os.replace(partial, PROMETHEUS_TEXTFILE_PATH)
@@ -0,0 +1,181 @@
+import bisect
+import threading
+
+import pandas as pd
+
+import db_connection
+import instrumentation
+import player_store
+import schema_registry
+
+# A board keeps one metric's values sorted ascending as (value, key) entries, so
+# top-k, rank and percentile are bisect lookups. A single changed value moves one
+# entry: bisect finds both slots in O(log n) and the list shifts in place.
+
+
+def build_board(values: dict) -> dict:
+    """Sorted board over {key: value}; missing (None/NaN) values are left out."""
+    values = {key: float(value) for key, value in values.items() if _present(value)}
+    entries = sorted((value, key) for key, value in values.items())
+    return {
+        "values": values,
+        "entries": entries,
+        "scores": [value for value, _ in entries],
+    }
+
+
+def set_value(board: dict, key, value):
+    """Move `key` to its new value; None or NaN removes it from the board."""
+    old = board["values"].pop(key, None)
+    if old is not None:
+        i = bisect.bisect_left(board["entries"], (old, key))
+        del board["entries"][i], board["scores"][i]
+    if _present(value):
+        value = float(value)
+        board["values"][key] = value
+        i = bisect.bisect_left(board["entries"], (value, key))
+        board["entries"].insert(i, (value, key))
+        board["scores"].insert(i, value)
+
+
+def top_k(board: dict, k: int = 10) -> list:
+    """[(key, value)] of the k highest values, highest first."""
+    return [(key, value) for value, key in reversed(board["entries"][-k:])] if k > 0 else []
+
+
+def rank(board: dict, key):
+    """(rank, percentile, size) for a key, or None if it is not on the board.
+
+    Rank 1 is the highest value and ties share a rank; the percentile is the
+    share of the board with a lower value.
+    """
+    value = board["values"].get(key)
+    if value is None:
+        return None
+    size = len(board["scores"])
+    higher = size - bisect.bisect_right(board["scores"], value)
+    lower = bisect.bisect_left(board["scores"], value)
+    return higher + 1, 100.0 * lower / size, size
+
+
+def _present(value) -> bool:
+    return not pd.isna(value)
+
+
+# ---------------- Board sets kept in step with CRUD writes ----------------
+# A board set is built once per data version. When a write in this process emits
+# a change event, every set that was current just before the write is patched
+# with just the changed rows instead of rebuilt; any other version change (e.g. a write from
+# another process) rebuilds the set on its next read.
+
+# Events with more rows than this (e.g. a bulk import) drop the sets instead, and
+# the next read rebuilds them once rather than patching them row by row
+PATCH_MAX_ROWS = 200
+
+# Writers emit their events while holding the write lock and then take _lock;
+# board reads only take _lock and read on their own connection, so they never wait on a writer's transaction
+_lock = threading.Lock()
+_sets = {}
+
+
+def register(name: str, build, patch):
+    """Declare a board set: `build()` returns {board_key: board}, `patch(boards, rows)` applies an event's row changes."""
+    _sets.setdefault(name, {"build": build, "patch": patch, "version": None, "boards": None})
+
+
+@instrumentation.traced
+def boards(name: str, version) -> dict:
+    """The named board set as of `version` (from db_connection.data_version())."""
+    with _lock:
+        entry = _sets[name]
+        if entry["version"] != version:
+            entry["boards"] = entry["build"]()
+            entry["version"] = version
+        return entry["boards"]
+
+
+def on_change(event: dict):
+    """player_store change listener."""
+    with _lock:
+        for entry in _sets.values():
+            if entry["boards"] is None:
+                continue
+            if entry["version"] != event["version"] - 1 or len(event["rows"]) > PATCH_MAX_ROWS:
+                entry["version"] = None
+                continue
+            entry["patch"](entry["boards"], event["rows"])
+            entry["version"] = event["version"]
+
+
+player_store.subscribe(on_change)
+
+
+# Per-format batting values as the CRUD page edits them, keyed by player_id
+def _build_crud_batting() -> dict:
+    with db_connection.connect() as conn:
+        stats = player_store.load_batsmen_stats(conn)
+    stats = stats.drop_duplicates(subset=["player_id", "format"])
+    return {
+        (field, format_): build_board(dict(zip(group["player_id"], group[field])))
+        for format_, group in stats.groupby("format")
+        for field in player_store.STAT_FIELDS
+    }
+
+
+def _patch_crud_batting(boards: dict, rows: list):
+    for row in rows:
+        for field in player_store.STAT_FIELDS:
+            board = boards.setdefault((field, row["format"]), build_board({}))
+            set_value(board, row["player_id"], row["after"][field] if row["after"] else None)
+
+
+register("crud_batting", _build_crud_batting, _patch_crud_batting)
+
+
+# Career totals per player for the leaderboard page: one board per numeric metric
+# and format, plus "All" across formats, keyed by player_id. Metrics are summed;
+# best-figures keys take the player's best.
+def _career_totals(df, cols, formats) -> dict:
+    parts = {format_: df[df[cols.format] == format_] for format_ in formats}
+    parts["All"] = df
+    aggregations = {**{metric: "sum" for metric in cols.metrics}, **{key: "max" for key in cols.best}}
+    return {format_: part.groupby(cols.id).agg(aggregations) for format_, part in parts.items()}
+
+
+def _build_career(dataset: str) -> dict:
+    cols = schema_registry.columns(dataset)
+    with db_connection.connect() as conn:
+        df = schema_registry.load(dataset, conn)
+    formats = sorted(df[cols.format].dropna().unique().tolist())
+    boards = {
+        (metric, format_): build_board(totals[metric].to_dict())
+        for format_, totals in _career_totals(df, cols, formats).items()
+        for metric in cols.metrics + cols.best
+    }
+    boards["formats"] = formats
+    boards["names"] = dict(zip(df[cols.id], df[cols.name]))
+    return boards
+
+
+def _patch_career(dataset: str, boards: dict, rows: list):
+    # Re-total just the event's players from the canonical table, which the write
+    # already refreshed: one load and one groupby however many rows the event has
+    cols = schema_registry.columns(dataset)
+    player_ids = list(dict.fromkeys(int(row["player_id"]) for row in rows))
+    if not player_ids:
+        return
+    with db_connection.connect() as conn:
+        df = schema_registry.load(dataset, conn, where={cols.id: player_ids})
+    for format_, totals in _career_totals(df, cols, boards["formats"]).items():
+        for metric in cols.metrics + cols.best:
+            board = boards.setdefault((metric, format_), build_board({}))
+            values = totals[metric].to_dict()
+            for player_id in player_ids:
+                set_value(board, player_id, values.get(player_id))
+    boards["names"].update(zip(df[cols.id], df[cols.name]))
+
+
+register("career_batting", lambda: _build_career("batting_stats"),
+         lambda boards, rows: _patch_career("batting_stats", boards, rows))
+# CRUD writes only change batting rows, so the bowling boards just move to the new version
+register("career_bowling", lambda: _build_career("bowling_stats"), lambda boards, rows: None)
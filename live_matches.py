@@ -1,6 +1,23 @@
+import sqlite3
 import streamlit as st
 import requests
 import json
+from datetime import datetime
+import db_connection
+import instrumentation
+import series_calendar
+
+
+def show_series_context(series_name, match_info):
+    """Caption a match with the calendar entry of the series it belongs to, if known."""
+    start_ms = match_info.get('startDate')
+    day = series_calendar.to_day(datetime.fromtimestamp(int(start_ms) / 1000) if start_ms else datetime.now())
+    with db_connection.connect() as conn:
+        entry = series_calendar.series_context(conn, series_name, day)
+    if entry:
+        kind = (entry['series_type'] or '').title()
+        st.caption(f"📅 {kind + ' series' if kind else 'Series'}, {entry['start_date']} → {entry['end_date']} "
+                   f"(day {day - entry['start_day'] + 1} of {entry['end_day'] - entry['start_day'] + 1})")
 
 def app():
     st.title("Live Scorecard")
@@ -13,6 +30,7 @@ def app():
 
     url = "https://cricbuzz-cricket.p.rapidapi.com/matches/v1/live"
 
+    @instrumentation.traced
     @st.cache_data(ttl=60)
     def fetch_live_data():
         """Fetches live match data from the Cricbuzz API."""
@@ -36,6 +54,15 @@ def app():
 
     live_data = fetch_live_data()
 
+    try:
+        with db_connection.connect() as conn:
+            active = series_calendar.active_now(conn)
+        st.caption(f"{len(active)} series in progress today")
+        has_calendar = True
+    except sqlite3.Error as e:
+        st.warning(f"Series calendar unavailable: {e}")
+        has_calendar = False
+
     if live_data and 'typeMatches' in live_data:
         for match_type in live_data['typeMatches']:
             st.subheader(f"🌐 {match_type['matchType']} Matches")
@@ -60,6 +87,8 @@ def app():
                                 st.write(f"**Match:** {team1_name} vs {team2_name}")
                                 st.write(f"**Status:** {match_status}")
                                 st.write(f"**Venue:** {ground}, {city}")
+                                if has_calendar:
+                                    show_series_context(series_name, match_info)
                                 
                                 # Display scores if available
                                 if 'team1Score' in match_score:
@@ -1,18 +1,70 @@
+import importlib
+import threading
 import streamlit as st
-import live_matches,Browse_data,Player_analytics,Sql_Analysis_Exploration,Players_Profile,Cricket_Analysis
+import instrumentation
 
-# Define the pages in a dictionary
+# Must be the first Streamlit call of every run, so it lives here rather than in a page
+st.set_page_config(page_title="Cricket Dashboard", layout="wide")
+
+# Define the pages in a dictionary: label -> module exposing app().
+# A page module is imported the first time it is selected, not at startup.
 pages = {
-    "Live Scorecard": live_matches,
-    "Player Analytics": Player_analytics,
-    "Browse Data": Browse_data,
-    "Sql_Analysis_Exploration": Sql_Analysis_Exploration,
-    "Players_Profile":Players_Profile,
-    "Cricket_Analysis":Cricket_Analysis
+    "Live Scorecard": "live_matches",
+    "Player Analytics": "Player_analytics",
+    "Browse Data": "Browse_data",
+    "Sql_Analysis_Exploration": "Sql_Analysis_Exploration",
+    "Players_Profile": "Players_Profile",
+    "Cricket_Analysis": "Cricket_Analysis",
+    "Team_analytics": "Team_analytics",
 }
+
+# Pages imported in the background when the process starts, e.g. the busiest ones
+WARM_UP = []
+
+
+def load_page(label: str):
+    # Imported modules are kept in sys.modules, so later reruns only look the page up
+    return importlib.import_module(pages[label])
+
+
+@st.cache_resource
+def warm_up(labels: tuple):
+    """Import the given pages once per process, off the script thread."""
+    thread = threading.Thread(target=lambda: [load_page(label) for label in labels], daemon=True)
+    thread.start()
+    return thread
+
+
+if WARM_UP:
+    warm_up(tuple(WARM_UP))
+
+
+def show_timings(run: dict):
+    """Debug sidebar: this run's spans, nested by depth, and the metrics exports."""
+    st.sidebar.markdown("**Timings for this run**")
+    st.sidebar.dataframe([
+        {"stage": "\u2003" * record["depth"] + record["name"],
+         "ms": round(record["seconds"] * 1000, 1),
+         "memory MB": round(record["memory_bytes"] / 2**20, 1)}
+        for record in run["spans"]
+    ], hide_index=True, use_container_width=True)
+    st.sidebar.download_button("Prometheus metrics", instrumentation.prometheus_text(), "metrics.prom", "text/plain")
+    st.sidebar.download_button("Recent spans (JSON lines)", instrumentation.spans_jsonl(), "spans.jsonl",
+                               "application/x-ndjson")
+
+
 # Add a sidebar for navigation
 st.sidebar.title("Cricket Dashboard")
 selection = st.sidebar.radio("Go to", list(pages.keys()))
+show_debug = st.sidebar.toggle("Show timings")
 
-# Run the selected page
-pages[selection].app()
+# Run the selected page, timed as one trace; the timings are shown even when a page stops early
+run = None
+try:
+    with instrumentation.trace(selection) as run:
+        with instrumentation.span("import page"):
+            page = load_page(selection)
+        page.app()
+finally:
+    if show_debug and run is not None:
+        show_timings(run)
@@ -0,0 +1,128 @@
+import sqlite3
+
+import pandas as pd
+
+import schema_registry
+
+# Canonical table -> table holding its percentile ranks, one row per (player, format, source)
+PERCENTILE_TABLES = {
+    "batting_stats": "batting_percentiles",
+    "bowling_stats": "bowling_percentiles",
+}
+
+# Innings a player needs in a format before they are ranked in it
+MIN_INNINGS = {"Test": 10, "ODI": 10, "T20": 10, "IPL": 10}
+DEFAULT_MIN_INNINGS = 10
+
+# Stats where a lower value is the better one
+LOWER_IS_BETTER = {
+    "batting_stats": {"ducks"},
+    "bowling_stats": {"avg", "eco", "sr"},
+}
+
+
+def _ranked(dataset: str) -> list:
+    cols = schema_registry.columns(dataset)
+    return cols.metrics + cols.best
+
+
+def recorded(dataset: str, stats: pd.DataFrame) -> pd.DataFrame:
+    """Per source, whether it records each ranked metric (any non-zero value in any format)."""
+    metrics = _ranked(dataset)
+    return stats[metrics].astype(float).fillna(0).ne(0).groupby(stats["source"]).any()
+
+
+def recorded_in_table(dataset: str, conn: sqlite3.Connection) -> pd.DataFrame:
+    """recorded() for the stored canonical table, as one aggregate query."""
+    table = schema_registry.SCHEMAS[dataset]["table"]
+    metrics = _ranked(dataset)
+    flags = ", ".join(f'MAX(IFNULL("{m}", 0) != 0) AS "{m}"' for m in metrics)
+    df = pd.read_sql_query(f"SELECT source, {flags} FROM {table} GROUP BY source", conn)
+    return df.set_index("source").astype(bool)
+
+
+def compute(dataset: str, stats: pd.DataFrame, recorded_by_source: pd.DataFrame = None) -> pd.DataFrame:
+    """Percentile (0-100, higher is better) of every metric within each format.
+
+    Batting and all-rounder rows are ranked together. Rows below the format's
+    innings threshold are kept but marked unqualified and get no percentiles.
+    A metric a source never records (all zeros, e.g. strike rate in the
+    all-rounder batting table) counts as missing for that source, not as 0.
+    When `stats` holds only some formats, pass the whole table's
+    `recorded_by_source` so that rule still looks at every format.
+    """
+    cols = schema_registry.columns(dataset)
+    metrics = _ranked(dataset)
+    threshold = stats[cols.format].map(MIN_INNINGS).fillna(DEFAULT_MIN_INNINGS)
+    qualified = stats["innings"].fillna(0) >= threshold
+
+    if recorded_by_source is None:
+        recorded_by_source = recorded(dataset, stats)
+    values = stats[metrics].astype(float)
+    values = values.where(recorded_by_source.reindex(stats["source"], fill_value=False)
+                          .set_axis(stats.index)[metrics])
+    lower = [m for m in metrics if m in LOWER_IS_BETTER.get(dataset, ())]
+    values[lower] = -values[lower]
+    values = values[qualified]
+    # One grouped rank pass covers every metric of every format
+    ranks = values.groupby(stats.loc[qualified, cols.format]).rank(pct=True, method="average") * 100
+
+    out = stats[[cols.id, cols.name, cols.format, "source"]].copy()
+    out["qualified"] = qualified.astype(int)
+    return pd.concat([out, ranks.round(1).reindex(stats.index)], axis=1)
+
+
+def _create_sql(dataset: str) -> str:
+    metrics = ", ".join(f'"{name}" REAL' for name in _ranked(dataset))
+    return (f"CREATE TABLE {PERCENTILE_TABLES[dataset]} (player_id INTEGER NOT NULL, player_name TEXT, "
+            f"format TEXT NOT NULL, source TEXT NOT NULL, qualified INTEGER, {metrics}, "
+            "PRIMARY KEY (player_id, format, source))")
+
+
+def _insert(conn: sqlite3.Connection, table: str, ranks: pd.DataFrame):
+    rows = ranks.astype(object).where(ranks.notna(), None)
+    conn.executemany(
+        f"INSERT INTO {table} VALUES ({', '.join('?' * len(rows.columns))})",
+        rows.itertuples(index=False, name=None),
+    )
+
+
+def build_percentile_tables(conn: sqlite3.Connection, datasets=None):
+    """(Re)build the percentile tables (all, or the given datasets'); run inside the caller's transaction.
+
+    Ranks are relative, so any change to a format's rows can move every player
+    in it; the whole table is recomputed, which is one vectorized pass.
+    """
+    for dataset in datasets or PERCENTILE_TABLES:
+        table = PERCENTILE_TABLES[dataset]
+        ranks = compute(dataset, schema_registry.load(dataset, conn))
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(_create_sql(dataset))
+        _insert(conn, table, ranks)
+
+
+def refresh_formats(conn: sqlite3.Connection, dataset: str, formats, recorded_before: pd.DataFrame):
+    """Re-rank only the given formats of a dataset after a write changed rows in them.
+
+    Ranks never cross formats, so the other formats keep their rows. The one
+    exception is a write that changes which metrics a source records
+    (`recorded_before` is recorded_in_table() from before the write): that
+    can move every format, so the dataset's table is rebuilt whole.
+    """
+    formats = sorted(formats)
+    if not formats:
+        return
+    recorded_after = recorded_in_table(dataset, conn)
+    if not recorded_after.equals(recorded_before):
+        build_percentile_tables(conn, [dataset])
+        return
+    cols = schema_registry.columns(dataset)
+    table = PERCENTILE_TABLES[dataset]
+    ranks = compute(dataset, schema_registry.load(dataset, conn, where={cols.format: formats}), recorded_after)
+    conn.execute(f"DELETE FROM {table} WHERE format IN ({', '.join('?' * len(formats))})", formats)
+    _insert(conn, table, ranks)
+
+
+def load(dataset: str, conn: sqlite3.Connection) -> pd.DataFrame:
+    """Stored percentile ranks for the qualified rows of a dataset."""
+    return pd.read_sql_query(f"SELECT * FROM {PERCENTILE_TABLES[dataset]} WHERE qualified = 1", conn)
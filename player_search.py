@@ -0,0 +1,58 @@
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+# Fraction of the query's trigrams a name must share to count as a match
+MIN_SIMILARITY = 0.3
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_search_index(players: pd.DataFrame, id_col: str = "player_id", name_col: str = "player_name") -> dict:
+    """Build a trigram index over player names, pointing at player ids."""
+    players = players[[id_col, name_col]].dropna().drop_duplicates(subset=id_col)
+    names = dict(zip(players[id_col].tolist(), players[name_col].astype(str).tolist()))
+    postings = defaultdict(list)
+    for player_id, name in names.items():
+        for gram in _trigrams(_normalize(name)):
+            postings[gram].append(player_id)
+    return {
+        "names": names,
+        "normalized": {pid: _normalize(name) for pid, name in names.items()},
+        "postings": dict(postings),
+        # Alphabetical listing for an empty search box, sorted once here instead of per rerun
+        "sorted_ids": sorted(names, key=lambda pid: names[pid].lower()),
+    }
+
+
+def search_players(index: dict, query: str, limit: int = 20) -> list:
+    """Return up to `limit` player ids ranked by prefix match, then trigram similarity.
+
+    Misspelt names still match as long as enough trigrams overlap, and a
+    name whose first or any later word starts with the query ranks first.
+    """
+    query = _normalize(query)
+    if not query:
+        return index["sorted_ids"][:limit]
+
+    grams = _trigrams(query)
+    hits = Counter()
+    for gram in grams:
+        hits.update(index["postings"].get(gram, ()))
+
+    scored = []
+    for player_id, shared in hits.items():
+        similarity = shared / len(grams)
+        name = index["normalized"][player_id]
+        is_prefix = name.startswith(query) or f" {query}" in name
+        if is_prefix or similarity >= MIN_SIMILARITY:
+            scored.append((not is_prefix, -similarity, name, player_id))
+    scored.sort()
+    return [player_id for *_, player_id in scored[:limit]]
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+
+def build_similarity_index(frames: list, id_col: str = "player_id", format_col: str = "format") -> dict:
+    """Build a player x (dataset, format, metric) feature matrix for nearest-neighbour search.
+
+    `frames` is a list of (stats_df, metric_cols) pairs that all describe the same
+    players. Every feature is standardized, a format a player has no row for counts
+    as zero, and each player's vector is scaled to unit length so the dot product
+    of two rows is their cosine similarity.
+    """
+    features = []
+    for i, (df, metric_cols) in enumerate(frames):
+        wide = df.pivot_table(index=id_col, columns=format_col, values=metric_cols, aggfunc="mean")
+        wide.columns = [f"{i}:{fmt}:{metric}" for metric, fmt in wide.columns]
+        features.append(wide)
+    if not features:
+        return {"ids": [], "row": {}, "matrix": np.zeros((0, 0), dtype=np.float32)}
+    wide = pd.concat(features, axis=1).astype(float)
+
+    values = wide.to_numpy()
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    std[~(std > 0)] = 1.0
+    values = np.nan_to_num((values - np.nan_to_num(mean)) / std)
+    norms = np.linalg.norm(values, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+
+    ids = wide.index.tolist()
+    return {
+        "ids": ids,
+        "row": {player_id: i for i, player_id in enumerate(ids)},
+        "matrix": np.ascontiguousarray(values / norms, dtype=np.float32),
+    }
+
+
+def similar_players(index: dict, player_id, k: int = 5) -> list:
+    """Return up to k [(player_id, similarity)] closest to a player, most similar first."""
+    i = index["row"].get(player_id)
+    if i is None or k <= 0:
+        return []
+    scores = index["matrix"] @ index["matrix"][i]
+    scores[i] = -np.inf
+    k = min(k, len(scores) - 1)
+    if k <= 0:
+        return []
+    # Partial selection of the k best, then only those k are sorted
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(index["ids"][j], float(scores[j])) for j in top]
@@ -0,0 +1,275 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import db_connection
+import ingest
+import write_coordinator
+
+PLAYERS_TABLE = "cricket_player_data"
+BATSMEN_TABLE = "all_batsmen_stats"
+
+# Tables mirrored to the CSV files the other tools still read
+CSV_EXPORTS = {
+    PLAYERS_TABLE: "Players_Data.csv",
+    BATSMEN_TABLE: "Batsmen_stats.csv",
+}
+
+PLAYER_FIELDS = ["name", "battingStyle", "bowlingStyle", "role", "team_name"]
+# A player has one row per team; these fields describe the player and are the same on every row
+PROFILE_FIELDS = ["name", "battingStyle", "bowlingStyle", "role"]
+STAT_FIELDS = ["runs", "average", "strike_rate"]
+
+# Values accepted by bulk import (the roster files use both BATSMAN and BATSMEN)
+ALLOWED_ROLES = ["BATSMAN", "BATSMEN", "BOWLER", "ALL ROUNDER", "WICKET KEEPER"]
+ALLOWED_BATTING_STYLES = ["Right-hand bat", "Left-hand bat"]
+MAX_STRIKE_RATE = 500
+IMPORT_REQUIRED = ["id", "name", "role"]
+IMPORT_OPTIONAL = ["battingStyle", "bowlingStyle", "team_name", "format", *STAT_FIELDS]
+
+# A single worker keeps exports ordered; at most one more export per file is queued
+_export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csv-export")
+_export_lock = threading.Lock()
+_pending_exports = {}
+
+# Called with every committed batting change, see _emit
+_listeners = []
+
+
+# ---------------- Reads ----------------
+
+def load_players(conn: sqlite3.Connection) -> pd.DataFrame:
+    return pd.read_sql_query(f"SELECT * FROM {PLAYERS_TABLE}", conn)
+
+
+def load_batsmen_stats(conn: sqlite3.Connection) -> pd.DataFrame:
+    return pd.read_sql_query(f"SELECT * FROM {BATSMEN_TABLE}", conn)
+
+
+def player_ids(conn: sqlite3.Connection) -> list:
+    return [r[0] for r in conn.execute(f"SELECT DISTINCT id FROM {PLAYERS_TABLE} ORDER BY rowid")]
+
+
+def stat_formats(conn: sqlite3.Connection) -> list:
+    return [r[0] for r in conn.execute(f"SELECT DISTINCT format FROM {BATSMEN_TABLE} ORDER BY rowid")]
+
+
+def player_teams(conn: sqlite3.Connection, player_id) -> list:
+    return [r[0] for r in conn.execute(f"SELECT team_name FROM {PLAYERS_TABLE} WHERE id = ? ORDER BY rowid",
+                                       (player_id,))]
+
+
+def get_player(conn: sqlite3.Connection, player_id, team_name) -> dict:
+    """The player's row for one team."""
+    cursor = conn.execute(f"SELECT * FROM {PLAYERS_TABLE} WHERE id = ? AND team_name IS ?", (player_id, team_name))
+    row = cursor.fetchone()
+    return dict(zip([d[0] for d in cursor.description], row)) if row else None
+
+
+def get_stats(conn: sqlite3.Connection, player_id, format_: str) -> dict:
+    cursor = conn.execute(
+        f"SELECT * FROM {BATSMEN_TABLE} WHERE player_id = ? AND format = ?", (player_id, format_)
+    )
+    row = cursor.fetchone()
+    return dict(zip([d[0] for d in cursor.description], row)) if row else None
+
+
+# ---------------- Change events ----------------
+
+def subscribe(listener):
+    """Call `listener(event)` after each committed write in this process.
+
+    An event is {"version": data version after the write, "rows": [...]} with one
+    row per changed batting record: {"player_id", "format", "before", "after"},
+    where before/after map STAT_FIELDS to values and are None for an insert/delete.
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def _emit(version: int, rows: list):
+    event = {"version": version, "rows": rows}
+    for listener in _listeners:
+        listener(event)
+
+
+def _change(player_id, format_, before, after) -> dict:
+    before, after = ({f: row[f] for f in STAT_FIELDS} if row is not None else None for row in (before, after))
+    return {"player_id": player_id, "format": format_, "before": before, "after": after}
+
+
+# ---------------- Writes ----------------
+# Each write touches only the affected rows, keeps the canonical tables in step
+# for that player and bumps the data version, all in one transaction.
+# Updates are optimistic: they only apply if the row still holds the values the
+# editor loaded, otherwise ConflictError is raised and nothing is written.
+# Once committed, the batting rows a write changed are sent to subscribers.
+
+def add_player(conn: sqlite3.Connection, player: dict, stats: dict):
+    """Insert a player and their batting row; raises sqlite3.IntegrityError on a duplicate key."""
+    with conn:
+        conn.execute(
+            f"INSERT INTO {PLAYERS_TABLE} (id, {', '.join(PLAYER_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            (player["id"], *[player[f] for f in PLAYER_FIELDS]),
+        )
+        conn.execute(
+            f"INSERT INTO {BATSMEN_TABLE} (player_id, player_name, format, {', '.join(STAT_FIELDS)}) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (player["id"], player["name"], stats["format"], *[stats[f] for f in STAT_FIELDS]),
+        )
+        ingest.refresh_canonical_players(conn, [player["id"]])
+        version = ingest.bump_data_version(conn)
+    _emit(version, [_change(player["id"], stats["format"], None, stats)])
+
+
+def update_player(conn: sqlite3.Connection, player_id, original: dict, player: dict,
+                  format_: str, original_stats: dict, stats: dict):
+    """Update a player and their batting row for one format, if unchanged since read.
+
+    `original` is the team row the editor loaded: only that row's team_name
+    changes, while PROFILE_FIELDS are written to every team row of the player
+    and the name to every one of their batting rows.
+    `original` / `original_stats` are the rows as the editor loaded them.
+    original_stats is None when the player had no row for that format; the row
+    is then inserted, and ConflictError is raised if someone added it meanwhile.
+    """
+    with conn:
+        cursor = conn.execute(
+            f"UPDATE {PLAYERS_TABLE} SET team_name = ? "
+            f"WHERE id = ? AND {' AND '.join(f'{f} IS ?' for f in PLAYER_FIELDS)}",
+            (player["team_name"], player_id, *[original[f] for f in PLAYER_FIELDS]),
+        )
+        write_coordinator.require_rows(cursor, f"Player {player_id} ({original['team_name']})")
+        conn.execute(
+            f"UPDATE {PLAYERS_TABLE} SET {', '.join(f'{f} = ?' for f in PROFILE_FIELDS)} WHERE id = ?",
+            (*[player[f] for f in PROFILE_FIELDS], player_id),
+        )
+        if original_stats is not None:
+            cursor = conn.execute(
+                f"UPDATE {BATSMEN_TABLE} SET {', '.join(f'{f} = ?' for f in STAT_FIELDS)} "
+                f"WHERE player_id = ? AND format = ? AND {' AND '.join(f'{f} IS ?' for f in STAT_FIELDS)}",
+                (*[stats[f] for f in STAT_FIELDS], player_id, format_,
+                 *[original_stats[f] for f in STAT_FIELDS]),
+            )
+            write_coordinator.require_rows(cursor, f"{format_} stats for player {player_id}")
+        else:
+            try:
+                conn.execute(
+                    f"INSERT INTO {BATSMEN_TABLE} (player_id, player_name, format, {', '.join(STAT_FIELDS)}) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (player_id, player["name"], format_, *[stats[f] for f in STAT_FIELDS]),
+                )
+            except sqlite3.IntegrityError:
+                raise write_coordinator.ConflictError(f"{format_} stats for player {player_id} were added by someone else") from None
+        # The name is the player's, so every format's row carries the new one
+        conn.execute(f"UPDATE {BATSMEN_TABLE} SET player_name = ? WHERE player_id = ?", (player["name"], player_id))
+        ingest.refresh_canonical_players(conn, [player_id])
+        version = ingest.bump_data_version(conn)
+    _emit(version, [_change(player_id, format_, original_stats, stats)])
+
+
+def delete_player(conn: sqlite3.Connection, player_id):
+    """Delete a player and all of their batting rows."""
+    with conn:
+        cursor = conn.execute(f"DELETE FROM {PLAYERS_TABLE} WHERE id = ?", (player_id,))
+        write_coordinator.require_rows(cursor, f"Player {player_id}")
+        cursor = conn.execute(
+            f"SELECT format, {', '.join(STAT_FIELDS)} FROM {BATSMEN_TABLE} WHERE player_id = ?", (player_id,)
+        )
+        removed = [dict(zip(["format", *STAT_FIELDS], row)) for row in cursor.fetchall()]
+        conn.execute(f"DELETE FROM {BATSMEN_TABLE} WHERE player_id = ?", (player_id,))
+        ingest.refresh_canonical_players(conn, [player_id])
+        version = ingest.bump_data_version(conn)
+    _emit(version, [_change(player_id, row["format"], row, None) for row in removed])
+
+
+def validate_import(rows: pd.DataFrame, existing_ids, formats) -> tuple:
+    """Check an uploaded roster in one vectorized pass; returns (valid, rejected).
+
+    Each row is one player plus, optionally, their batting stats for one format
+    (`format`, `runs`, `average`, `strike_rate`). Rejected rows carry a `reason`
+    column listing every rule they broke. Raises ValueError if a required
+    column is missing altogether.
+    """
+    missing = [c for c in IMPORT_REQUIRED if c not in rows.columns]
+    if missing:
+        raise ValueError(f"missing required columns: {', '.join(missing)}")
+    rows = rows.reindex(columns=[*IMPORT_REQUIRED, *IMPORT_OPTIONAL])
+    ids = pd.to_numeric(rows["id"], errors="coerce")
+    numbers = {f: pd.to_numeric(rows[f], errors="coerce") for f in STAT_FIELDS}
+    has_stats = rows["format"].notna()
+
+    checks = {
+        "id is not a whole number": ids.isna() | (ids % 1 != 0),
+        "id already exists": ids.isin(list(existing_ids)),
+        "duplicate id/format in file": pd.DataFrame({"id": ids, "format": rows["format"]}).duplicated(keep=False),
+        "name is empty": rows["name"].fillna("").astype(str).str.strip() == "",
+        "unknown role": ~rows["role"].isin(ALLOWED_ROLES),
+        "unknown batting style": rows["battingStyle"].notna() & ~rows["battingStyle"].isin(ALLOWED_BATTING_STYLES),
+        "unknown format": has_stats & ~rows["format"].isin(list(formats)),
+        "runs must be a whole number >= 0": has_stats & ~((numbers["runs"] >= 0) & (numbers["runs"] % 1 == 0)),
+        "average must be >= 0": has_stats & ~(numbers["average"] >= 0),
+        f"strike rate must be 0-{MAX_STRIKE_RATE}": has_stats & ~numbers["strike_rate"].between(0, MAX_STRIKE_RATE),
+    }
+    reasons = pd.Series("", index=rows.index)
+    for message, failed in checks.items():
+        reasons = reasons.mask(failed, reasons + message + "; ")
+
+    bad = reasons != ""
+    rejected = rows[bad].assign(reason=reasons[bad].str.rstrip("; "))
+    valid = rows[~bad].assign(id=ids[~bad].astype("int64"), **{f: numbers[f][~bad] for f in STAT_FIELDS})
+    valid["runs"] = valid["runs"].astype("Int64")
+    return valid, rejected
+
+
+def import_players(conn: sqlite3.Connection, rows: pd.DataFrame):
+    """Insert validated roster rows in a single transaction."""
+    rows = rows.astype(object).where(rows.notna(), None)
+    players = rows.drop_duplicates("id")
+    stats = rows[rows["format"].notna()]
+    with conn:
+        conn.executemany(
+            f"INSERT INTO {PLAYERS_TABLE} (id, {', '.join(PLAYER_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            players[["id", *PLAYER_FIELDS]].itertuples(index=False, name=None),
+        )
+        conn.executemany(
+            f"INSERT INTO {BATSMEN_TABLE} (player_id, player_name, format, {', '.join(STAT_FIELDS)}) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            stats[["id", "name", "format", *STAT_FIELDS]].itertuples(index=False, name=None),
+        )
+        ingest.refresh_canonical_players(conn, players["id"].tolist())
+        version = ingest.bump_data_version(conn)
+    _emit(version, [_change(row["id"], row["format"], None, row) for row in stats.to_dict("records")])
+
+
+# ---------------- CSV mirror ----------------
+
+def _export_csv(table: str):
+    path = CSV_EXPORTS[table]
+    with _export_lock:
+        _pending_exports.pop(table, None)
+    # The snapshot is read while holding the file lock, so exports from several
+    # app processes land in order and an older snapshot never replaces a newer one
+    with write_coordinator.file_lock(path):
+        # Own connection so the export never holds the shared one
+        conn = sqlite3.connect(db_connection.DB_PATH)
+        try:
+            df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+        finally:
+            conn.close()
+        write_coordinator.atomic_write_csv(df, path)
+
+
+def schedule_csv_export(*tables: str):
+    """Rewrite the mirrored CSV files in the background, off the request path.
+
+    A burst of edits collapses into one export per file: while an export is
+    still queued, later changes are picked up by it instead of queueing another.
+    """
+    for table in tables:
+        with _export_lock:
+            if table in _pending_exports:
+                continue
+            _pending_exports[table] = _export_executor.submit(_export_csv, table)
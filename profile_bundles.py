@@ -0,0 +1,49 @@
+import pandas as pd
+
+import instrumentation
+
+
+@instrumentation.traced
+def pivot_by_player(df: pd.DataFrame, id_col: str, format_col: str, metric_cols: list) -> dict:
+    """Split a stats frame into {player_id: metrics by format} in one pass.
+
+    Metrics are rounded once for the whole dataset; each player's pivot then
+    only drops the columns that are empty for that player.
+    """
+    if df.empty:
+        return {}
+    values = df[metric_cols].astype(float).round(2)
+    values[format_col] = df[format_col].to_numpy()
+    values = values.set_index(format_col)
+
+    pivots = {}
+    for player_id, group in values.groupby(df[id_col].to_numpy(), sort=False):
+        pivots[player_id] = group.dropna(axis=1, how='all')
+    return pivots
+
+
+def player_info_by_id(players_df: pd.DataFrame, id_col: str, info_cols: list) -> dict:
+    """Split Players_Data into {id: display-ready info rows} in one pass."""
+    if players_df.empty:
+        return {}
+    titles = [c.replace('_', ' ').title() for c in info_cols]
+    info = players_df[info_cols].drop_duplicates()
+    return {
+        player_id: group.set_axis(titles, axis=1).reset_index(drop=True)
+        for player_id, group in info.groupby(info[id_col].to_numpy(), sort=False)
+    }
+
+
+def build_profile_bundles(players_info: dict, stats: dict) -> dict:
+    """Combine per-player info and per-dataset pivots into {player_id: bundle}.
+
+    `stats` maps a dataset key (e.g. 'batsmen') to the output of pivot_by_player;
+    each bundle holds 'info' plus one entry per dataset the player appears in.
+    """
+    bundles = {}
+    for player_id, info in players_info.items():
+        bundles.setdefault(player_id, {})['info'] = info
+    for key, pivots in stats.items():
+        for player_id, pivot in pivots.items():
+            bundles.setdefault(player_id, {})[key] = pivot
+    return bundles
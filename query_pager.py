@@ -0,0 +1,63 @@
+import sqlite3
+
+import pandas as pd
+
+# Rows pulled from the cursor per fetchmany() call
+CHUNK_SIZE = 500
+
+# Row counting stops here; larger results are reported as "COUNT_CAP+"
+COUNT_CAP = 100_000
+
+
+def _strip(query: str) -> str:
+    return query.strip().rstrip(";")
+
+
+def _bind(params, **extra):
+    """Append extra bound values to positional (tuple) or named (dict) params."""
+    if isinstance(params, dict):
+        return {**params, **extra}, {name: f":{name}" for name in extra}
+    return (*params, *extra.values()), {name: "?" for name in extra}
+
+
+def stream_query(conn: sqlite3.Connection, query: str, params=(), chunk_size: int = CHUNK_SIZE):
+    """Yield (columns, rows) chunks from the cursor without materializing the result.
+
+    An empty result yields a single chunk with no rows, so callers still get the columns.
+    """
+    cursor = conn.execute(query, params)
+    columns = [d[0] for d in cursor.description]
+    rows = cursor.fetchmany(chunk_size)
+    yield columns, rows
+    while rows:
+        rows = cursor.fetchmany(chunk_size)
+        if rows:
+            yield columns, rows
+
+
+def read_query(conn: sqlite3.Connection, query: str, params=(), chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
+    """Execute a query and build a DataFrame from fetchmany() chunks."""
+    cursor = conn.execute(query, params)
+    columns = [d[0] for d in cursor.description]
+    rows = []
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        rows.extend(chunk)
+    return pd.DataFrame(rows, columns=columns)
+
+
+def page_query(query: str, params=(), page: int = 0, page_size: int = 50) -> tuple:
+    """Return (sql, params) that fetch a single page of a query's result."""
+    params, marks = _bind(params, page_limit=page_size, page_offset=page * page_size)
+    sql = f"SELECT * FROM ({_strip(query)}) LIMIT {marks['page_limit']} OFFSET {marks['page_offset']}"
+    return sql, params
+
+
+def estimate_row_count(conn: sqlite3.Connection, query: str, params=(), cap: int = COUNT_CAP) -> tuple:
+    """Count result rows up to `cap`; returns (count, is_exact)."""
+    params, marks = _bind(params, count_cap=cap + 1)
+    sql = f"SELECT COUNT(*) FROM (SELECT 1 FROM ({_strip(query)}) LIMIT {marks['count_cap']})"
+    count = conn.execute(sql, params).fetchone()[0]
+    return min(count, cap), count <= cap
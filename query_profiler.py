@@ -0,0 +1,144 @@
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import query_pager
+
+# Query metrics are kept out of the data database so profiling never writes to it
+METRICS_DB_PATH = "query_metrics.db"
+
+# The progress handler fires once every this many SQLite VM instructions
+PROGRESS_STEP = 100
+
+
+def explain_query_plan(conn: sqlite3.Connection, query: str, params=()) -> pd.DataFrame:
+    """Return the EXPLAIN QUERY PLAN rows for a query."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {query.strip().rstrip(';')}", params).fetchall()
+    return pd.DataFrame(rows, columns=["id", "parent", "notused", "detail"])
+
+
+def format_query_plan(plan: pd.DataFrame) -> str:
+    """Render plan rows as an indented tree, like the sqlite3 shell does."""
+    depth = {0: 0}
+    lines = []
+    for row in plan.itertuples(index=False):
+        depth[row.id] = depth.get(row.parent, 0) + 1
+        lines.append("  " * (depth[row.id] - 1) + row.detail)
+    return "\n".join(lines)
+
+
+def table_aliases(query: str) -> dict:
+    """Map "FROM table alias" / "JOIN table AS alias" aliases back to table names."""
+    pattern = r"\b(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?(\w+)"
+    return {alias: table for table, alias in re.findall(pattern, query, flags=re.IGNORECASE)}
+
+
+def full_scan_tables(conn: sqlite3.Connection, plan: pd.DataFrame, query: str = "") -> list:
+    """Database tables the plan reads with a full scan (no index)."""
+    known = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    aliases = table_aliases(query)
+    tables = []
+    for detail in plan["detail"]:
+        parts = detail.split()
+        # "SCAN all_batsmen_stats", but not "SCAN t USING INDEX ..." or CTE/subquery scans,
+        # nor a virtual table (e.g. R*Tree) scan that passes constraints ("INDEX 2:B0D1")
+        constrained = "VIRTUAL" in parts and not parts[-1].endswith(":")
+        if len(parts) >= 2 and parts[0] == "SCAN" and "USING" not in parts and not constrained:
+            table = aliases.get(parts[1], parts[1])
+            if table in known:
+                tables.append(table)
+    return tables
+
+
+def estimate_rows_scanned(conn: sqlite3.Connection, tables: list) -> int:
+    """Rows read by full scans, taken from the current table sizes."""
+    return sum(conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables)
+
+
+def profile_query(conn: sqlite3.Connection, query: str, params=()) -> tuple:
+    """Execute a query and return (DataFrame, stats) with plan, timing and size figures.
+
+    Python's sqlite3 module does not expose sqlite3_stmt_status, so work done is
+    measured in VM steps through the progress handler and rows scanned is estimated
+    from the tables the plan reads without an index.
+    """
+    plan = explain_query_plan(conn, query, params)
+    scans = full_scan_tables(conn, plan, query)
+
+    steps = [0]
+
+    def count_steps():
+        steps[0] += PROGRESS_STEP
+        return 0
+
+    conn.set_progress_handler(count_steps, PROGRESS_STEP)
+    try:
+        start = time.perf_counter()
+        df = query_pager.read_query(conn, query, params)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    finally:
+        conn.set_progress_handler(None, 0)
+
+    stats = {
+        "elapsed_ms": round(elapsed_ms, 3),
+        "vm_steps": steps[0],
+        "rows_scanned_est": estimate_rows_scanned(conn, scans),
+        "rows_returned": len(df),
+        "result_bytes": int(df.memory_usage(deep=True).sum()),
+        "full_scans": ", ".join(scans),
+        "plan": format_query_plan(plan),
+    }
+    return df, stats
+
+
+def _metrics_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(METRICS_DB_PATH)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS query_metrics (
+            executed_at TEXT,
+            query_name TEXT,
+            elapsed_ms REAL,
+            vm_steps INTEGER,
+            rows_scanned_est INTEGER,
+            rows_returned INTEGER,
+            result_bytes INTEGER,
+            full_scans TEXT
+        )
+    """)
+    return conn
+
+
+def log_query_metrics(query_name: str, stats: dict):
+    """Append one run's stats to the local metrics table."""
+    conn = _metrics_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO query_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                datetime.now().isoformat(timespec="seconds"),
+                query_name,
+                stats["elapsed_ms"],
+                stats["vm_steps"],
+                stats["rows_scanned_est"],
+                stats["rows_returned"],
+                stats["result_bytes"],
+                stats["full_scans"],
+            ),
+        )
+    conn.close()
+
+
+def load_query_metrics(query_name: str = None) -> pd.DataFrame:
+    """Logged runs, optionally for a single query, oldest first."""
+    conn = _metrics_connection()
+    if query_name is None:
+        df = pd.read_sql_query("SELECT * FROM query_metrics ORDER BY executed_at", conn)
+    else:
+        df = pd.read_sql_query(
+            "SELECT * FROM query_metrics WHERE query_name = ? ORDER BY executed_at", conn, params=(query_name,)
+        )
+    conn.close()
+    return df
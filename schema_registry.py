@@ -0,0 +1,143 @@
+import sqlite3
+from collections import namedtuple
+
+import pandas as pd
+
+# Column roles: "id" and "name" identify the player, "format" is the match format,
+# "metric" columns are numeric stats, "best" columns are best-figures sort keys
+# (a player's best is the highest key, never a sum), "attribute" columns are descriptive.
+ID, NAME, FORMAT, METRIC, BEST, ATTRIBUTE = "id", "name", "format", "metric", "best", "attribute"
+
+# Every dataset a page reads, declared once: its table and (column, role, dtype) in order.
+# Integer counts use pandas' nullable Int64 since not every source fills every stat.
+SCHEMAS = {
+    "players": {
+        "table": "cricket_player_data",
+        "columns": [
+            ("id", ID, "Int64"),
+            ("name", NAME, "object"),
+            ("battingStyle", ATTRIBUTE, "object"),
+            ("bowlingStyle", ATTRIBUTE, "object"),
+            ("role", ATTRIBUTE, "object"),
+            ("team_name", ATTRIBUTE, "object"),
+        ],
+    },
+    "batting_stats": {
+        "table": "batting_stats",
+        "columns": [
+            ("player_id", ID, "Int64"),
+            ("player_name", NAME, "object"),
+            ("format", FORMAT, "object"),
+            ("source", ATTRIBUTE, "object"),
+            ("matches", METRIC, "Int64"),
+            ("innings", METRIC, "Int64"),
+            ("not_out", METRIC, "Int64"),
+            ("runs", METRIC, "Int64"),
+            ("balls_faced", METRIC, "Int64"),
+            ("highest_score", METRIC, "Int64"),
+            ("avg", METRIC, "float64"),
+            ("strike_rate", METRIC, "float64"),
+            ("fours", METRIC, "Int64"),
+            ("sixes", METRIC, "Int64"),
+            ("fifty_plus", METRIC, "Int64"),
+            ("hundreds", METRIC, "Int64"),
+            ("double_hundreds", METRIC, "Int64"),
+            ("ducks", METRIC, "Int64"),
+        ],
+    },
+    "bowling_stats": {
+        "table": "bowling_stats",
+        "columns": [
+            ("player_id", ID, "Int64"),
+            ("player_name", NAME, "object"),
+            ("format", FORMAT, "object"),
+            ("source", ATTRIBUTE, "object"),
+            ("matches", METRIC, "Int64"),
+            ("innings", METRIC, "Int64"),
+            ("balls", METRIC, "Int64"),
+            ("runs", METRIC, "Int64"),
+            ("maidens", METRIC, "Int64"),
+            ("wickets", METRIC, "Int64"),
+            ("avg", METRIC, "float64"),
+            ("eco", METRIC, "float64"),
+            ("sr", METRIC, "float64"),
+            ("bbi", ATTRIBUTE, "object"),
+            ("bbm", ATTRIBUTE, "object"),
+            ("4w", METRIC, "Int64"),
+            ("5w", METRIC, "Int64"),
+            ("10w", METRIC, "Int64"),
+            ("bbi_wickets", ATTRIBUTE, "Int64"),
+            ("bbi_runs", ATTRIBUTE, "Int64"),
+            ("bbi_key", BEST, "Int64"),
+            ("bbm_wickets", ATTRIBUTE, "Int64"),
+            ("bbm_runs", ATTRIBUTE, "Int64"),
+            ("bbm_key", BEST, "Int64"),
+        ],
+    },
+}
+
+# Resolved column handles a page works with instead of searching df.columns
+Columns = namedtuple("Columns", ["id", "name", "format", "metrics", "best", "attributes", "all"])
+
+
+class SchemaError(Exception):
+    """A dataset on disk no longer matches its declared schema."""
+
+
+def columns(dataset: str) -> Columns:
+    """Resolved column handles for a registered dataset."""
+    specs = SCHEMAS[dataset]["columns"]
+
+    def single(role):
+        matches = [name for name, r, _ in specs if r == role]
+        return matches[0] if matches else None
+
+    return Columns(
+        id=single(ID),
+        name=single(NAME),
+        format=single(FORMAT),
+        metrics=[name for name, r, _ in specs if r == METRIC],
+        best=[name for name, r, _ in specs if r == BEST],
+        attributes=[name for name, r, _ in specs if r == ATTRIBUTE],
+        all=[name for name, _, _ in specs],
+    )
+
+
+def validate(dataset: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Check a loaded frame against its schema and cast it to the declared dtypes.
+
+    Raises SchemaError on a missing column or a value that does not fit the
+    declared dtype, so drift shows up at load time rather than as a wrong column.
+    """
+    specs = SCHEMAS[dataset]["columns"]
+    missing = [name for name, _, _ in specs if name not in df.columns]
+    if missing:
+        raise SchemaError(f"{dataset}: missing columns {missing}")
+    typed = {}
+    for name, _, dtype in specs:
+        try:
+            typed[name] = df[name].astype(dtype)
+        except (TypeError, ValueError) as e:
+            raise SchemaError(f"{dataset}.{name}: cannot read as {dtype} ({e})") from e
+    return pd.DataFrame(typed, index=df.index)
+
+
+def load(dataset: str, conn: sqlite3.Connection, where: dict = None) -> pd.DataFrame:
+    """Load a registered dataset from its table and validate it.
+
+    `where` filters by column equality, e.g. {"source": "batsman"}; a list
+    value matches any of its items.
+    """
+    sql = f"SELECT * FROM {SCHEMAS[dataset]['table']}"
+    params = ()
+    if where:
+        conditions = []
+        for name, value in where.items():
+            if isinstance(value, (list, tuple)):
+                conditions.append(f'"{name}" IN ({", ".join("?" * len(value))})')
+                params += tuple(value)
+            else:
+                conditions.append(f'"{name}" = ?')
+                params += (value,)
+        sql += " WHERE " + " AND ".join(conditions)
+    return validate(dataset, pd.read_sql_query(sql, conn, params=params))
@@ -0,0 +1,67 @@
+import sqlite3
+from datetime import date, datetime
+
+EPOCH = date(1970, 1, 1)
+
+
+def to_day(value) -> int:
+    """Whole days since 1970-01-01 for a date, datetime or ISO date string (as stored in start_day/end_day)."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+def overlapping(conn: sqlite3.Connection, first_day: int, last_day: int) -> list:
+    """Series running at any point between first_day and last_day (inclusive), by start day.
+
+    Answered by the series_intervals R*Tree (see ingest.build_series_calendar).
+    """
+    cursor = conn.execute(
+        """
+        SELECT c.* FROM series_intervals i
+        JOIN series_calendar c ON c.id = i.id
+        WHERE i.start_day <= ? AND i.end_day >= ?
+        ORDER BY c.start_day, c.end_day
+        """,
+        (last_day, first_day),
+    )
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def active_on(conn: sqlite3.Connection, day: int) -> list:
+    """Series in progress on a given day."""
+    return overlapping(conn, day, day)
+
+
+def active_now(conn: sqlite3.Connection) -> list:
+    return active_on(conn, to_day(date.today()))
+
+
+def series_context(conn: sqlite3.Connection, series_name: str, day: int):
+    """The calendar entry for a named series running on `day`, or None.
+
+    Names from the live feed and the series table can differ slightly, so an
+    exact (case-insensitive) match is preferred, then one name containing the
+    other. A missing name on either side never matches.
+    """
+    wanted = _normalise(series_name)
+    if not wanted:
+        return None
+    running = active_on(conn, day)
+    for entry in running:
+        if _normalise(entry["name"]) == wanted:
+            return entry
+    for entry in running:
+        name = _normalise(entry["name"])
+        if name and (wanted in name or name in wanted):
+            return entry
+    return None
+
+
+def _normalise(name) -> str:
+    # Missing names come through as None or as the text "None"/"nan"; they match nothing
+    name = "" if name is None else str(name).strip().lower()
+    return "" if name in ("none", "nan", "null") else name
@@ -0,0 +1,109 @@
+from itertools import product
+
+import pandas as pd
+
+import schema_registry
+
+# Cube dimensions, in index order; "All" marks a rolled-up dimension
+DIMENSIONS = ["team_name", "format", "role"]
+ALL = "All"
+
+# Integer counts are summed and float rates averaged, as elsewhere; these are
+# per-player bests, so a cell reports the highest one instead of a sum
+MAX_MEASURES = {"highest_score"}
+
+
+def _measures(dataset: str) -> dict:
+    dtypes = {name: dtype for name, _, dtype in schema_registry.SCHEMAS[dataset]["columns"]}
+    return {
+        metric: "max" if metric in MAX_MEASURES else "mean" if dtypes[metric] == "float64" else "sum"
+        for metric in schema_registry.columns(dataset).metrics
+    }
+
+
+def _cells(frame: pd.DataFrame, measures: dict) -> pd.DataFrame:
+    # Sums, non-null counts and maxes per finest cell, in one pass over the rows
+    return frame.groupby(DIMENSIONS).agg(
+        **{f"{m}__sum": (m, "sum") for m in measures},
+        **{f"{m}__n": (m, "count") for m in measures},
+        **{f"{m}__max": (m, "max") for m in measures},
+    )
+
+
+def _build_dataset(dataset: str, stats: pd.DataFrame, teams: pd.DataFrame) -> pd.DataFrame:
+    cols = schema_registry.columns(dataset)
+    measures = _measures(dataset)
+    joined = stats.reset_index(drop=True).rename_axis("_row").reset_index().merge(
+        teams, left_on=cols.id, right_on="id")
+    frame = joined[list(measures)].astype(float)
+    frame[DIMENSIONS] = joined[DIMENSIONS].fillna("Unknown")
+    frame["_player"] = joined[cols.id]
+    frame["_row"] = joined["_row"]
+
+    # A player listed for several teams has one joined row per team; roll-ups
+    # across teams count each stats row once, under the player's first team
+    once = frame.drop_duplicates("_row")
+    team_rolled_at = DIMENSIONS.index("team_name")
+
+    # Every roll-up is aggregated from these cells, not from the rows again
+    bases = {False: _cells(frame, measures), True: _cells(once, measures)}
+    parts = []
+    for rolled in product([False, True], repeat=len(DIMENSIONS)):
+        keep = [d for d, r in zip(DIMENSIONS, rolled) if not r]
+        rows, base = (once, bases[True]) if rolled[team_rolled_at] else (frame, bases[False])
+        cells = base.groupby(level=keep) if keep else base.groupby(lambda _: 0)
+        part = cells.agg({c: "max" if c.endswith("__max") else "sum" for c in base.columns})
+        # Distinct players cannot be summed from cells, since a player spans formats
+        players = rows.groupby(keep)["_player"].nunique() if keep else pd.Series([rows["_player"].nunique()])
+        part["players"] = players.to_numpy()
+        part = part.reset_index(drop=not keep)
+        for d, r in zip(DIMENSIONS, rolled):
+            if r:
+                part[d] = ALL
+        parts.append(part)
+    cells = pd.concat(parts, ignore_index=True)
+
+    cube = cells[DIMENSIONS + ["players"]].copy()
+    for m, how in measures.items():
+        if how == "sum":
+            cube[m] = cells[f"{m}__sum"].where(cells[f"{m}__n"] > 0)
+        elif how == "mean":
+            cube[m] = cells[f"{m}__sum"] / cells[f"{m}__n"].where(cells[f"{m}__n"] > 0)
+        else:
+            cube[m] = cells[f"{m}__max"]
+    return cube.set_index(DIMENSIONS).sort_index()
+
+
+def build_team_cube(players: pd.DataFrame, stats: dict) -> dict:
+    """Aggregate each stats dataset by (team, format, role), with every roll-up to "All".
+
+    `stats` maps a registry dataset name to its loaded frame. A player listed for
+    several teams counts towards each of them, and once towards team "All".
+    """
+    teams = players[["id", "team_name", "role"]].drop_duplicates()
+    return {dataset: _build_dataset(dataset, df, teams) for dataset, df in stats.items()}
+
+
+def cube_slice(cube: dict, dataset: str, team: str = ALL, format_: str = ALL, role: str = ALL):
+    """Measures for one cell as a Series, or None if nothing falls in it."""
+    try:
+        return cube[dataset].loc[(team, format_, role)]
+    except KeyError:
+        return None
+
+
+def breakdown(cube: dict, dataset: str, by: str, team: str = ALL, format_: str = ALL, role: str = ALL) -> pd.DataFrame:
+    """One row per value of the `by` dimension, the other dimensions held at the given values."""
+    fixed = {"team_name": team, "format": format_, "role": role}
+    del fixed[by]
+    try:
+        rows = cube[dataset].xs(tuple(fixed.values()), level=list(fixed))
+    except KeyError:
+        return cube[dataset].iloc[0:0].droplevel(list(fixed))
+    return rows.drop(index=ALL, errors="ignore")
+
+
+def dimension_values(cube: dict, dataset: str, dimension: str) -> list:
+    """Values a dimension takes in the cube, without the "All" roll-up."""
+    values = cube[dataset].index.get_level_values(dimension).unique()
+    return sorted(v for v in values if v != ALL)
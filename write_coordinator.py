@@ -0,0 +1,63 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class ConflictError(Exception):
+    """The row or file changed after it was read, so the write was not applied."""
+
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive advisory lock for `path` (taken on a side `.lock` file).
+
+    Only writers take the lock; readers keep reading the current file, which is
+    only ever swapped whole by atomic_write_csv.
+    """
+    with open(path + ".lock", "a+b") as handle:
+        if fcntl:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_csv(df: pd.DataFrame, path: str):
+    """Write a CSV to a temp file in the same directory, then rename it over `path`.
+
+    A crash mid-write leaves the old file untouched instead of a truncated one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as handle:
+            df.to_csv(handle, index=False)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def require_rows(cursor, what: str):
+    """Raise ConflictError if a guarded UPDATE/DELETE matched no rows."""
+    if cursor.rowcount == 0:
+        raise ConflictError(f"{what} was changed or removed by someone else")